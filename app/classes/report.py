@@ -1,13 +1,70 @@
-from datetime import datetime
+import os
+from datetime import date, datetime
+from functools import lru_cache
+from io import BytesIO
 from pathlib import Path
+from typing import Optional
 
+from PIL import Image
+from reportlab import rl_config
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4, landscape, portrait
-from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib.units import inch
 from reportlab.lib.utils import ImageReader
 from reportlab.platypus import BaseDocTemplate, Frame, PageTemplate
 
+from app.functions.styles import STYLESHEET
+
+LOGO_PATH = Path(__file__).resolve().parent.parent / "assets" / "logo.jpeg"
+LOGO_DPI = int(os.getenv("REPORT_LOGO_DPI", 300))
+LOGO_QUALITY = int(os.getenv("REPORT_LOGO_QUALITY", 85))
+
+HEADER_HEIGHT = 0.9 * inch
+LOGO_MAX_SIZE = (2.4 * inch, HEADER_HEIGHT - 8)
+
+PAGE_COMPRESSION = os.getenv("REPORT_PAGE_COMPRESSION", "1") != "0"
+
+# Streams are stored as raw binary instead of ASCII85 text, which would add
+# a quarter to every compressed page and to the embedded logo
+rl_config.useA85 = 0
+
+
+@lru_cache(maxsize=1)
+def load_logo() -> Optional[Image.Image]:
+    if not LOGO_PATH.exists():
+        return None
+
+    try:
+        with Image.open(LOGO_PATH) as image:
+            return image.convert("RGB")
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=8)
+def logo_placement(max_w: float, max_h: float):
+    logo = load_logo()
+
+    if logo is None:
+        return None
+
+    img_w, img_h = logo.size
+    scale = min(max_w / img_w, max_h / img_h)
+    width, height = img_w * scale, img_h * scale
+
+    # Embed the logo at the resolution it is printed at rather than the
+    # full-size original; built once per process and shared by every page
+    size = (round(width / 72 * LOGO_DPI), round(height / 72 * LOGO_DPI))
+
+    if size[0] < img_w:
+        logo = logo.resize(size, Image.LANCZOS)
+
+    buf = BytesIO()
+    logo.save(buf, "JPEG", quality=LOGO_QUALITY, optimize=True)
+    buf.seek(0)
+
+    return ImageReader(buf), width, height
+
 
 class ReportTemplate(BaseDocTemplate):
     def __init__(
@@ -16,6 +73,8 @@ class ReportTemplate(BaseDocTemplate):
         header_text: str = "Report",
         orientation: str = "portrait",
         base_pagesize=A4,
+        invariant: bool = False,
+        generated_on: Optional[date] = None,
         **kwargs
     ):
         if orientation.lower() == "landscape":
@@ -23,15 +82,20 @@ class ReportTemplate(BaseDocTemplate):
         else:
             kwargs["pagesize"] = portrait(base_pagesize)
 
+        # Invariant output drops the timestamps and random document id from the
+        # PDF, so the same input and generated_on date give byte-identical files
+        kwargs["invariant"] = 1 if invariant else 0
+        kwargs.setdefault("pageCompression", 1 if PAGE_COMPRESSION else 0)
+
         super().__init__(filename, **kwargs)
 
         # Keep styles available for body content
-        self.styles = getSampleStyleSheet()
+        self.styles = STYLESHEET
 
-        self.logo_path = Path(__file__).resolve().parent.parent / "assets" / "logo.jpeg"
+        self.logo_path = LOGO_PATH
 
         margin = 0.5 * inch
-        header_h = 0.9 * inch
+        header_h = HEADER_HEIGHT
         footer_h = 0.25 * inch
         gap = 0.10 * inch
 
@@ -44,6 +108,10 @@ class ReportTemplate(BaseDocTemplate):
 
         self.frame = Frame(body_x, body_y, body_w, body_h, id="normal")
         self.header_text = header_text
+        self.generated_on = (generated_on or datetime.now()).strftime('%d %b %Y')
+
+        self._decoration_form_name = "page_decoration"
+        self._decoration_canvas = None
 
         self.header_frame = Frame(
             margin,
@@ -72,6 +140,27 @@ class ReportTemplate(BaseDocTemplate):
         ])
 
     def _draw_header_footer(self, canvas, doc):
+        # The decoration is identical on every page apart from the page number,
+        # so it is drawn once per canvas as a form XObject and stamped after that
+        if self._decoration_canvas is not canvas:
+            canvas.beginForm(self._decoration_form_name)
+            self._draw_page_decoration(canvas)
+            canvas.endForm()
+            self._decoration_canvas = canvas
+
+        canvas.saveState()
+        canvas.doForm(self._decoration_form_name)
+
+        right_x = self.header_frame.x1 + self.header_frame.width
+        footer_y = self.footer_frame.y1 + 4
+
+        canvas.setFillColor(colors.black)
+        canvas.setFont("Helvetica", 9)
+        canvas.drawRightString(right_x, footer_y, f"Page: {doc.page}")
+
+        canvas.restoreState()
+
+    def _draw_page_decoration(self, canvas):
         canvas.saveState()
 
         line_color = colors.lightgrey
@@ -92,20 +181,12 @@ class ReportTemplate(BaseDocTemplate):
         canvas.line(left_x, header_top_y + 4, right_x, header_top_y + 4)
 
         # Logo
-        logo_reserved_w = 2.4 * inch
-
-        if self.logo_path.exists():
-            try:
-                logo = ImageReader(str(self.logo_path))
-                img_w, img_h = logo.getSize()
-
-                max_logo_w = logo_reserved_w
-                max_logo_h = header_h - 8
+        placement = logo_placement(*LOGO_MAX_SIZE)
 
-                scale = min(max_logo_w / img_w, max_logo_h / img_h)
-                logo_w = img_w * scale
-                logo_h = img_h * scale
+        if placement is not None:
+            logo, logo_w, logo_h = placement
 
+            try:
                 logo_x = right_x - logo_w
                 logo_y = header_y + (header_h - logo_h) / 2
 
@@ -152,9 +233,8 @@ class ReportTemplate(BaseDocTemplate):
         canvas.drawString(
             left_x,
             footer_y,
-            f"Generated on {datetime.now().strftime('%d %b %Y')}",
+            f"Generated on {self.generated_on}",
         )
-        canvas.drawRightString(right_x, footer_y, f"Page: {doc.page}")
 
         canvas.line(
             left_x,
@@ -163,4 +243,4 @@ class ReportTemplate(BaseDocTemplate):
             self.footer_frame.y1 + self.footer_frame.height + 4,
         )
 
-        canvas.restoreState()
\ No newline at end of file
+        canvas.restoreState()
@@ -0,0 +1,120 @@
+import hashlib
+import os
+import tempfile
+from io import BytesIO
+from typing import BinaryIO, Iterator, List, Optional
+
+SPOOL_MAX_SIZE = int(os.getenv("REPORT_SPOOL_MAX_SIZE", 2 * 1024 * 1024))
+SPOOL_CHUNK_SIZE = 64 * 1024
+
+
+class SpooledDocument:
+    # What a render worker hands back: the bytes themselves for small
+    # documents, or the path of the temp file they spilled to. Either way it
+    # pickles cheaply, and the caller reads it in chunks and closes it when done.
+
+    def __init__(self, data: Optional[bytes], path: Optional[str], size: int, checksum: str):
+        self.data = data
+        self.path = path
+        self.size = size
+        self.checksum = checksum
+
+    def open(self) -> BinaryIO:
+        if self.path is not None:
+            return open(self.path, "rb")
+
+        return BytesIO(self.data)
+
+    def read(self) -> bytes:
+        with self.open() as file:
+            return file.read()
+
+    def chunks(self, chunk_size: int = SPOOL_CHUNK_SIZE) -> Iterator[bytes]:
+        with self.open() as file:
+            while chunk := file.read(chunk_size):
+                yield chunk
+
+    def spill(self, dir: Optional[str] = None) -> None:
+        # Moves in-memory bytes to a temp file, for holders that keep
+        # documents around longer than a single request
+        if self.path is not None or self.data is None:
+            return
+
+        with tempfile.NamedTemporaryFile(dir=dir or os.getenv("REPORT_SPOOL_DIR") or None, prefix="fresco-", delete=False) as file:
+            file.write(self.data)
+
+        self.path = file.name
+        self.data = None
+
+    def close(self) -> None:
+        if self.path is not None:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+            self.path = None
+
+        self.data = None
+
+
+class SpooledOutput:
+    # File-like output for ReportTemplate and the exporters. Writes stay in
+    # memory up to max_size and move to a named temp file past that, so large
+    # documents never cross the process boundary as bytes.
+
+    def __init__(self, max_size: Optional[int] = None, dir: Optional[str] = None):
+        self.max_size = SPOOL_MAX_SIZE if max_size is None else max_size
+        self.dir = dir or os.getenv("REPORT_SPOOL_DIR") or None
+
+        self._chunks: List[bytes] = []
+        self._file = None
+        self._size = 0
+        self._sha256 = hashlib.sha256()
+
+    def write(self, data: bytes) -> int:
+        self._sha256.update(data)
+        self._size += len(data)
+
+        if self._file is None and self._size > self.max_size:
+            self._file = tempfile.NamedTemporaryFile(dir=self.dir, prefix="fresco-", delete=False)
+
+            for chunk in self._chunks:
+                self._file.write(chunk)
+
+            self._chunks = []
+
+        if self._file is not None:
+            self._file.write(data)
+        else:
+            self._chunks.append(bytes(data))
+
+        return len(data)
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+
+    # Enough of the io protocol for io.TextIOWrapper and zipfile to write
+    # into it. It's append-only, so zipfile falls back to streaming mode
+
+    @property
+    def closed(self) -> bool:
+        return False
+
+    def writable(self) -> bool:
+        return True
+
+    def readable(self) -> bool:
+        return False
+
+    def seekable(self) -> bool:
+        return False
+
+    def document(self) -> SpooledDocument:
+        if self._file is None:
+            return SpooledDocument(b"".join(self._chunks), None, self._size, self._sha256.hexdigest())
+
+        self._file.close()
+
+        return SpooledDocument(None, self._file.name, self._size, self._sha256.hexdigest())
@@ -0,0 +1,125 @@
+from typing import Any, Iterator, List, Optional, Tuple
+
+from reportlab.platypus import Flowable, Table, TableStyle
+
+# Rows measured per Table wrap while filling a page
+MEASURE_BATCH_ROWS = 64
+
+
+class ChunkedTable(Flowable):
+    # Lays a long table out page by page. Body rows are pulled from an
+    # iterator only as far as the current page needs, measured in small
+    # batches, and handed to a fixed-height Table for that page, so layout
+    # costs O(rows) and no more than about a page of row flowables is alive
+    # at once. The rows still to come stay with the remainder returned by
+    # split().
+
+    def __init__(
+        self,
+        header: List[Any],
+        rows: Iterator[List[Any]],
+        colWidths: List[float],
+        style: TableStyle,
+        body_style: TableStyle,
+        hAlign: str = "CENTER",
+        buffered: Optional[List[Tuple[List[Any], float]]] = None,
+        headerHeight: Optional[float] = None,
+        exhausted: bool = False,
+    ):
+        super().__init__()
+        self.header = header
+        self.rows = rows
+        self.colWidths = colWidths
+        self.style = style
+        self.body_style = body_style
+        self.hAlign = hAlign
+        self.buffered = buffered or []
+        self.headerHeight = headerHeight
+        self.exhausted = exhausted
+        self.width = sum(colWidths)
+        self.height = 0
+
+    def _fill(self, availWidth: float, availHeight: float) -> float:
+        # Buffers rows until they overflow availHeight or run out, and
+        # returns the height of the header plus everything buffered
+        used = (self.headerHeight or 0) + sum(height for _, height in self.buffered)
+
+        while not self.exhausted and (self.headerHeight is None or used <= availHeight):
+            batch = []
+
+            for row in self.rows:
+                batch.append(row)
+
+                if len(batch) == MEASURE_BATCH_ROWS:
+                    break
+            else:
+                self.exhausted = True
+
+            table = Table([self.header, *batch], colWidths=self.colWidths)
+            table.setStyle(self.body_style)
+            table.wrap(availWidth, availHeight)
+            heights = table._rowHeights
+
+            if self.headerHeight is None:
+                self.headerHeight = heights[0]
+                used += heights[0]
+
+            self.buffered.extend(zip(batch, heights[1:]))
+            used += sum(heights[1:])
+
+        return used
+
+    def _table(self, rows: List[Tuple[List[Any], float]], last: bool) -> Table:
+        table = Table(
+            [self.header, *(row for row, _ in rows)],
+            colWidths=self.colWidths,
+            rowHeights=[self.headerHeight, *(height for _, height in rows)],
+            hAlign=self.hAlign,
+            repeatRows=1,
+        )
+        table.setStyle(self.style if last else self.body_style)
+
+        return table
+
+    def wrap(self, availWidth, availHeight):
+        self.height = self._fill(availWidth, availHeight)
+
+        return self.width, self.height
+
+    def split(self, availWidth, availHeight):
+        self._fill(availWidth, availHeight)
+
+        used = self.headerHeight
+        end = 0
+
+        while end < len(self.buffered) and used + self.buffered[end][1] <= availHeight:
+            used += self.buffered[end][1]
+            end += 1
+
+        if end == 0:
+            return []
+
+        if end == len(self.buffered) and self.exhausted:
+            return [self._table(self.buffered, last=True)]
+
+        # The page's rows go to its Table and this flowable is dropped, so
+        # they're released once the page has been drawn
+        return [
+            self._table(self.buffered[:end], last=False),
+            ChunkedTable(
+                self.header,
+                self.rows,
+                self.colWidths,
+                self.style,
+                self.body_style,
+                hAlign=self.hAlign,
+                buffered=self.buffered[end:],
+                headerHeight=self.headerHeight,
+                exhausted=self.exhausted,
+            ),
+        ]
+
+    def draw(self):
+        table = self._table(self.buffered, last=True)
+        table.wrapOn(self.canv, self.width, self.height)
+        table.drawOn(self.canv, 0, 0)
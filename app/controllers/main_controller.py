@@ -1,6 +1,8 @@
-from fastapi import APIRouter
+from typing import Any
+from fastapi import APIRouter, Request, Response
 from fastapi.concurrency import run_in_threadpool
 from fastapi_restful.cbv import cbv
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 main_router = APIRouter()
 
 @cbv(main_router)
@@ -12,4 +14,21 @@ class MainController:
     @main_router.get('/ping')
     async def ping(self) -> dict[str, str]:
         return { "ping": "pong" }
-        
\ No newline at end of file
+
+    @main_router.get('/pools')
+    async def pools(self, request: Request) -> dict[str, Any]:
+        return {
+            "render_executor": request.app.state.render_executor.stats(),
+            "storage_uploader": request.app.state.storage_uploader.stats(),
+            "report_cache": request.app.state.report_cache.stats(),
+            "rendered_cache": request.app.state.rendered_cache.stats(),
+            "report_jobs": await request.app.state.report_jobs.stats(),
+            "idempotency": request.app.state.idempotency_store.stats(),
+            "admission": {
+                name: limit.stats() for name, limit in request.app.state.admission_limits.items()
+            },
+        }
+
+    @main_router.get('/metrics')
+    async def metrics(self) -> Response:
+        return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
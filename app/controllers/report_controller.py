@@ -1,29 +1,156 @@
-from typing import Any, Dict
-from fastapi import APIRouter, Body, Depends
+from datetime import date
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from fastapi_restful.cbv import cbv
 
+from app.functions.export import EXPORT_FORMATS
+from app.helpers.body import typed_body
+from app.helpers.idempotency import IdempotencyStore, get_idempotency_store
+from app.helpers.jobs import ReportJobQueue, get_report_jobs
+from app.helpers.responses import FastJSONResponse
+from app.helpers.streaming import stream_document
+from app.models.report import AllocatedShipment, Company, ReportBatch
 from app.services.report_service import ReportService
+from app.utils import fingerprint
 
 report_router = APIRouter()
 
+def report_options(
+    fast_cells: bool = Query(False),
+    generated_on: Optional[date] = Query(None),
+    incremental: bool = Query(False),
+) -> Dict[str, Any]:
+    return {
+        "fast_cells": fast_cells,
+        "generated_on": generated_on.isoformat() if generated_on else None,
+        "incremental": incremental,
+    }
+
+def report_output(
+    output: str = Query("url", pattern="^(url|pdf|csv|xlsx)$"),
+    upload: bool = Query(False),
+    index: Optional[int] = Query(None, ge=0),
+) -> Dict[str, Any]:
+    return {
+        "format": output,
+        "upload": upload,
+        "index": index,
+    }
+
 @cbv(report_router)
 class ReportController:
     report_service: ReportService = Depends(ReportService)
+    report_jobs: ReportJobQueue = Depends(get_report_jobs)
+    idempotency_store: IdempotencyStore = Depends(get_idempotency_store)
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255)
+
+    async def _enqueue(self, kind: str, body: Any, options: Dict[str, Any], include_body: bool, total: Optional[int] = None) -> Dict[str, Any]:
+        job_id = await self.report_jobs.enqueue(kind, body, options, include_body, total=total)
+
+        return {
+            "job_id": job_id,
+            "status": "queued",
+            "status_url": f"/reports/jobs/{job_id}",
+        }
+
+    async def _create(self, kind: str, body: Any, options: Dict[str, Any], include_body: bool, mode: str, total: Optional[int] = None) -> FastJSONResponse:
+        async def produce():
+            if mode == "job":
+                return 202, await self._enqueue(kind, body, options, include_body, total=total)
+
+            return 200, await getattr(self.report_service, f"create_{kind}")(body, options=options, include_body=include_body)
+
+        if self.idempotency_key is None:
+            status_code, content = await produce()
+            replayed = False
+        else:
+            # Retries of the same request under the same key reuse the first
+            # result, including while the first one is still being rendered
+            status_code, content, replayed = await self.idempotency_store.run(
+                kind,
+                self.idempotency_key,
+                fingerprint({"body": body, "options": options, "include_body": include_body, "mode": mode}),
+                produce,
+            )
+
+        headers = {"Idempotent-Replayed": "true"} if replayed else {}
+
+        if isinstance(content, dict) and "etag" in content:
+            headers["ETag"] = f'"{content["etag"]}"'
+
+        return FastJSONResponse(status_code=status_code, content=content, headers=headers)
+
+    async def _stream(self, kind: str, body: Any, options: Dict[str, Any], output: Dict[str, Any]) -> StreamingResponse:
+        format = output["format"]
+
+        document, entry, finalize = await self.report_service.preview_document(
+            kind,
+            body,
+            options=options,
+            index=output["index"],
+            upload=output["upload"],
+            format=format,
+        )
+
+        media_type, disposition = EXPORT_FORMATS[format]
+
+        if format == "pdf":
+            count_header = {"X-Page-Count": str(entry["page_count"])}
+        else:
+            count_header = {"X-Row-Count": str(entry["row_count"])}
+
+        return stream_document(
+            document,
+            media_type,
+            f"{entry['id']}.{format}",
+            headers={
+                "ETag": f'"{entry["etag"]}"',
+                **count_header,
+            },
+            finalize=finalize,
+            disposition=disposition,
+        )
+
+    async def _respond(self, kind: str, body: Any, options: Dict[str, Any], include_body: bool, mode: str, output: Dict[str, Any]):
+        if output["format"] == "url":
+            return await self._create(kind, body, options, include_body, mode)
+
+        # Jobs only ever store PDFs and hand back their URLs
+        if mode == "job":
+            raise HTTPException(status_code=400, detail=f"output={output['format']} can't be combined with mode=job")
+
+        # A PDF is one company's document; CSV and XLSX already hold them all
+        if output["format"] != "pdf" and output["index"] is not None:
+            raise HTTPException(status_code=400, detail="index only applies to output=pdf")
+
+        return await self._stream(kind, body, options, output)
+
+    @report_router.get('/reports/jobs/{job_id}', operation_id="get_report_job")
+    async def get_report_job(self, job_id: str):
+        job = await self.report_jobs.get(job_id)
+
+        if job is None:
+            raise HTTPException(status_code=404, detail="Report job not found")
+
+        return job
         
     @report_router.post('/reports/release-forms', operation_id="create_release_form")
-    async def create_release_form(self, body: Any = Body(...)):
-        return await self.report_service.create_release_form(body)
+    async def create_release_form(self, body: List[Company] = Depends(typed_body(List[Company])), options: Dict[str, Any] = Depends(report_options), include_body: bool = Query(False), mode: str = Query("sync", pattern="^(sync|job)$"), output: Dict[str, Any] = Depends(report_output)):
+        return await self._respond("release_form", body, options, include_body, mode, output)
     
     @report_router.post('/reports/shipment-allocations', operation_id="create_shipment_allocation")
-    async def create_shipment_allocation(self, body: Any = Body(...)):
-        return await self.report_service.create_shipment_allocation(body)
+    async def create_shipment_allocation(self, body: AllocatedShipment = Depends(typed_body(AllocatedShipment)), options: Dict[str, Any] = Depends(report_options), include_body: bool = Query(False), mode: str = Query("sync", pattern="^(sync|job)$"), output: Dict[str, Any] = Depends(report_output)):
+        return await self._respond("shipment_allocation", body, options, include_body, mode, output)
     
     @report_router.post('/reports/collection-forms', operation_id="create_collection_form")
-    async def create_collection_form(self, body: Any = Body(...)):
-        return await self.report_service.create_collection_form(body)
+    async def create_collection_form(self, body: List[Company] = Depends(typed_body(List[Company])), options: Dict[str, Any] = Depends(report_options), include_body: bool = Query(False), mode: str = Query("sync", pattern="^(sync|job)$"), output: Dict[str, Any] = Depends(report_output)):
+        return await self._respond("collection_form", body, options, include_body, mode, output)
     
     @report_router.post('/reports/customer-allocation-forms', operation_id="create_customer_allocation_form")
-    async def create_customer_allocation_form(self, body: Any = Body(...)):
-        return await self.report_service.create_customer_allocation_form(body)
-        
-        
\ No newline at end of file
+    async def create_customer_allocation_form(self, body: List[Company] = Depends(typed_body(List[Company])), options: Dict[str, Any] = Depends(report_options), include_body: bool = Query(False), mode: str = Query("sync", pattern="^(sync|job)$"), output: Dict[str, Any] = Depends(report_output)):
+        return await self._respond("customer_allocation_form", body, options, include_body, mode, output)
+
+    @report_router.post('/reports/batch', operation_id="create_report_batch")
+    async def create_report_batch(self, body: ReportBatch = Depends(typed_body(ReportBatch)), options: Dict[str, Any] = Depends(report_options), include_body: bool = Query(False), mode: str = Query("sync", pattern="^(sync|job)$")):
+        return await self._create("batch", body, options, include_body, mode, total=len(body.kinds) * len(body.companies))
@@ -1,33 +1,37 @@
-from typing import Any, Dict
-from fastapi import APIRouter, Body, Depends
+from fastapi import APIRouter, Depends
 from fastapi_restful.cbv import cbv
 
-from app.services.scanner_service import ScannerService
+from app.helpers.body import typed_body
+from app.helpers.responses import FastJSONResponse
+from app.models.scanner import ScanRequest
+from app.services.scanner_service import ScannerService, get_scanner_service
 
 scanner_router = APIRouter()
 
 @cbv(scanner_router)
 class ScannerController:
-    scanner_service: ScannerService = Depends(ScannerService)
+    # Routes return FastJSONResponse themselves so the records go straight to
+    # orjson instead of through jsonable_encoder first
+    scanner_service: ScannerService = Depends(get_scanner_service)
         
     @scanner_router.post('/scanner/template_one', operation_id="scanner_template_one")
-    async def scanner_template_one(self, body: Any = Body(...)):
-        return await self.scanner_service.scanner_template_one(body)
+    async def scanner_template_one(self, body: ScanRequest = Depends(typed_body(ScanRequest))):
+        return FastJSONResponse(await self.scanner_service.scanner_template_one(body))
     
     @scanner_router.post('/scanner/template_two', operation_id="scanner_template_two")
-    async def scanner_template_two(self, body: Any = Body(...)):
-        return await self.scanner_service.scanner_template_two(body)
+    async def scanner_template_two(self, body: ScanRequest = Depends(typed_body(ScanRequest))):
+        return FastJSONResponse(await self.scanner_service.scanner_template_two(body))
     
     @scanner_router.post('/scanner/template_three', operation_id="scanner_template_three")
-    async def scanner_template_three(self, body: Any = Body(...)):
-        return await self.scanner_service.scanner_template_three(body)
+    async def scanner_template_three(self, body: ScanRequest = Depends(typed_body(ScanRequest))):
+        return FastJSONResponse(await self.scanner_service.scanner_template_three(body))
     
     @scanner_router.post('/scanner/template_four', operation_id="scanner_template_four")
-    async def scanner_template_four(self, body: Any = Body(...)):
-        return await self.scanner_service.scanner_template_four(body)
+    async def scanner_template_four(self, body: ScanRequest = Depends(typed_body(ScanRequest))):
+        return FastJSONResponse(await self.scanner_service.scanner_template_four(body))
     
     @scanner_router.post('/scanner/template_five', operation_id="scanner_template_five")
-    async def scanner_template_five(self, body: Any = Body(...)):
-        return await self.scanner_service.scanner_template_five(body)
+    async def scanner_template_five(self, body: ScanRequest = Depends(typed_body(ScanRequest))):
+        return FastJSONResponse(await self.scanner_service.scanner_template_five(body))
     
         
\ No newline at end of file
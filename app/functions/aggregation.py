@@ -0,0 +1,225 @@
+import math
+from typing import Any, Dict, Iterable, List, Sequence, Tuple, Union
+
+import pandas as pd
+
+from app.models.report import ShipmentItem
+from app.utils import to_number
+
+# Columns summed per table. weight is the allocated weight a customer is
+# billed for, falling back to the net weight when none was recorded
+NUMERIC_COLUMNS = ("net_weight", "weight", "pieces_per_box", "price", "price_per_kilo")
+
+EMPTY_TOTALS: Dict[str, float] = {"boxes": 0, **{column: 0.0 for column in NUMERIC_COLUMNS}}
+
+# (table, awb, customer, product, item)
+ItemRow = Tuple[int, Any, Any, Any, ShipmentItem]
+
+
+# Documents with fewer items than this are aggregated in plain Python.
+# Building a DataFrame and running groupby has a fixed cost that only pays
+# off once there are enough rows to vectorise over
+FRAME_MIN_ROWS = 2000
+
+# Items without a customer are listed under this name in release forms
+UNALLOCATED = "Unallocated"
+
+# Column name -> values, used in place of a DataFrame for small documents
+ItemColumns = Dict[str, List[Any]]
+ItemFrame = Union[pd.DataFrame, ItemColumns]
+
+
+def _numeric(values: Sequence[Any]) -> pd.Series:
+    # Same rules as to_number/to_float: missing or unparseable values count as 0
+    return pd.to_numeric(pd.Series(values, dtype=object), errors="coerce").fillna(0.0).astype(float)
+
+
+def _weight(item: ShipmentItem) -> Any:
+    return item.customer_weight or item.weight or item.net_weight
+
+
+def item_frame(rows: Iterable[ItemRow]) -> ItemFrame:
+    rows = list(rows)
+    tables, awbs, customers, products, items = zip(*rows) if rows else ((), (), (), (), ())
+
+    raw = {
+        "net_weight": [item.net_weight for item in items],
+        "weight": [_weight(item) for item in items],
+        "pieces_per_box": [item.pieces_per_box for item in items],
+        "price": [item.price for item in items],
+        "price_per_kilo": [item.todays_price_per_kilo for item in items],
+    }
+
+    if len(rows) < FRAME_MIN_ROWS:
+        return {
+            "table": list(tables),
+            "awb": list(awbs),
+            "customer": list(customers),
+            "product": list(products),
+            **{column: [to_number(value, 0.0) for value in values] for column, values in raw.items()},
+        }
+
+    return pd.DataFrame({
+        "table": pd.Series(tables, dtype="int64"),
+        "awb": pd.Series(awbs, dtype=object),
+        "customer": pd.Series(customers, dtype=object),
+        "product": pd.Series(products, dtype=object),
+        **{column: _numeric(values) for column, values in raw.items()},
+    })
+
+
+def _group(keys: List[Any]) -> Dict[Any, List[int]]:
+    # Row positions per key, in order of first appearance like groupby(sort=False)
+    groups: Dict[Any, List[int]] = {}
+
+    for position, key in enumerate(keys):
+        groups.setdefault(key, []).append(position)
+
+    return groups
+
+
+def _sum(values: List[float], positions: List[int]) -> float:
+    return math.fsum(values[position] for position in positions)
+
+
+def table_totals(frame: ItemFrame) -> Dict[int, Dict[str, float]]:
+    if isinstance(frame, dict):
+        return {
+            table: {
+                "boxes": len(positions),
+                **{column: _sum(frame[column], positions) for column in NUMERIC_COLUMNS},
+            }
+            for table, positions in _group(frame["table"]).items()
+        }
+
+    grouped = frame.groupby("table", sort=False)
+    totals = grouped[list(NUMERIC_COLUMNS)].sum()
+    totals.insert(0, "boxes", grouped.size())
+
+    return totals.to_dict("index")
+
+
+def item_totals(items: Iterable[ShipmentItem]) -> Dict[str, float]:
+    return table_totals(item_frame((0, None, None, None, item) for item in items)).get(0, EMPTY_TOTALS)
+
+
+# One frame per document. Tables are numbered in the order the renderer
+# lays them out, so totals can be looked up by position
+
+def release_frame(groups: Dict[str, Dict[str, Dict[str, Dict[str, Any]]]]) -> ItemFrame:
+    tables = (customer for customers in groups.values() for customer in customers.items())
+
+    return item_frame(
+        (table, awb, customer_name, None, item)
+        for table, (customer_name, awb_groups) in enumerate(tables)
+        for awb, awb_data in awb_groups.items()
+        for item in awb_data["items"]
+    )
+
+
+def collection_frame(groups: Dict[str, Dict[str, Dict[str, List[ShipmentItem]]]]) -> ItemFrame:
+    tables = (customer for customers in groups.values() for customer in customers.items())
+
+    return item_frame(
+        (table, awb, customer_name, None, item)
+        for table, (customer_name, awb_groups) in enumerate(tables)
+        for awb, items in awb_groups.items()
+        for item in items
+    )
+
+
+def customer_allocation_frame(groups: Dict[str, Dict[str, List[ShipmentItem]]]) -> ItemFrame:
+    tables = (
+        (product_name, groups[production_date][product_name])
+        for production_date in sorted(groups.keys())
+        for product_name in sorted(groups[production_date].keys())
+    )
+
+    return item_frame(
+        (table, item.awb, None, product_name, item)
+        for table, (product_name, items) in enumerate(tables)
+        for item in items
+    )
+
+
+def release_summary(frame: ItemFrame) -> Dict[str, Any]:
+    if isinstance(frame, dict):
+        customers = [UNALLOCATED if customer is None else customer for customer in frame["customer"]]
+        awbs = frame["awb"]
+        weight = frame["net_weight"]
+
+        return {
+            "total_customers": len(set(customers)),
+            "total_awbs": len(set(awbs)),
+            "total_boxes": len(customers),
+            "total_weight": math.fsum(weight),
+            "customers": {
+                customer: {
+                    "awbs": len({awbs[position] for position in positions}),
+                    "boxes": len(positions),
+                    "weight": _sum(weight, positions),
+                }
+                for customer, positions in _group(customers).items()
+            },
+        }
+
+    # A null customer would be dropped by groupby, or become a NaN key that
+    # can't be looked up, so it's named before grouping
+    frame = frame.assign(customer=frame["customer"].fillna(UNALLOCATED))
+    by_customer = frame.groupby("customer", sort=False)
+    awbs = frame.drop_duplicates(["customer", "awb"]).groupby("customer", sort=False).size()
+    boxes = by_customer.size()
+    weight = by_customer["net_weight"].sum()
+
+    return {
+        "total_customers": frame["customer"].nunique(),
+        "total_awbs": frame["awb"].nunique(dropna=False),
+        "total_boxes": len(frame),
+        "total_weight": float(frame["net_weight"].sum()),
+        "customers": {
+            customer: {
+                "awbs": int(awbs[customer]),
+                "boxes": int(boxes[customer]),
+                "weight": float(weight[customer]),
+            }
+            for customer in boxes.index
+        },
+    }
+
+
+def customer_allocation_summary(frame: ItemFrame, awbs: List[str]) -> Dict[str, Any]:
+    if isinstance(frame, dict):
+        products = _group(frame["product"])
+        weight = frame["weight"]
+
+        return {
+            "total_awbs": len(set(awbs)),
+            "total_products": len(products),
+            "total_boxes": len(frame["product"]),
+            "total_weight": math.fsum(weight),
+            "products": {
+                product: {
+                    "boxes": len(products[product]),
+                    "weight": _sum(weight, products[product]),
+                }
+                for product in sorted(products)
+            },
+        }
+
+    by_product = frame.groupby("product", sort=True)
+    boxes = by_product.size()
+    weight = by_product["weight"].sum()
+
+    return {
+        "total_awbs": len(set(awbs)),
+        "total_products": frame["product"].nunique(),
+        "total_boxes": len(frame),
+        "total_weight": float(frame["weight"].sum()),
+        "products": {
+            product: {
+                "boxes": int(boxes[product]),
+                "weight": float(weight[product]),
+            }
+            for product in boxes.index
+        },
+    }
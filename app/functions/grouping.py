@@ -0,0 +1,133 @@
+from typing import Any, Dict, Iterable, List, Tuple
+
+from app.models.report import Shipment, ShipmentItem
+
+
+def _storage_company_name(shipment: Shipment, current: str) -> str:
+    # The collection point is the last shipment's storage company; shipments
+    # without one leave it as it was
+    company = shipment.storage_companies
+
+    return (company.name if company else None) or current
+
+
+def group_release_items(shipments: List[Shipment]) -> Dict[str, Dict[str, Dict[str, Dict[str, Any]]]]:
+    groups: Dict[str, Dict[str, Dict[str, Dict[str, Any]]]] = {}
+
+    for shipment in shipments:
+        awb = shipment.awb
+        production_date = shipment.production_date
+        supplier = shipment.supplier
+
+        for item in shipment.shipment_items:
+            customer = item.customer
+            customer_name = customer.name if customer else "Unallocated"
+
+            customers = groups.setdefault(production_date, {})
+            awb_groups = customers.setdefault(customer_name, {})
+            awb_group = awb_groups.setdefault(awb, {"supplier": None, "items": []})
+            awb_group["supplier"] = supplier
+            awb_group["items"].append(item)
+
+    return groups
+
+
+def group_collection_items(shipments: List[Shipment]) -> Tuple[Dict[str, Dict[str, Dict[str, List[ShipmentItem]]]], str]:
+    groups: Dict[str, Dict[str, Dict[str, List[ShipmentItem]]]] = {}
+    storage_company_name = ""
+
+    for shipment in shipments:
+        awb = shipment.awb
+        production_date = shipment.production_date
+        storage_company_name = _storage_company_name(shipment, storage_company_name)
+
+        for item in shipment.shipment_items:
+            customer = item.customer
+
+            if customer:
+                customer_name = customer.name
+                customers = groups.setdefault(production_date, {})
+                awb_groups = customers.setdefault(customer_name, {})
+                awb_groups.setdefault(awb, []).append(item)
+
+    return groups, storage_company_name
+
+
+def group_customer_allocation_items(shipments: List[Shipment]) -> Tuple[Dict[str, Dict[str, List[ShipmentItem]]], List[str]]:
+    groups: Dict[str, Dict[str, List[ShipmentItem]]] = {}
+    awbs: List[str] = []
+
+    for shipment in shipments:
+        production_date = shipment.production_date
+        awb = shipment.awb
+
+        if awb and awb not in awbs:
+            awbs.append(awb)
+
+        for item in shipment.shipment_items:
+            product = item.product
+            if not product:
+                continue
+
+            product_name = product.description or "Unknown Product"
+            groups.setdefault(production_date, {}).setdefault(product_name, []).append(item)
+
+    return groups, awbs
+
+
+def index_shipments(shipments: List[Shipment], kinds: Iterable[str] = ("release_form", "collection_form", "customer_allocation_form")) -> Dict[str, Any]:
+    # One pass over the items that produces the groupings of the requested
+    # company reports, for callers that render several kinds from one dataset
+    release = {} if "release_form" in kinds else None
+    collection = {} if "collection_form" in kinds else None
+    customer_allocation = {} if "customer_allocation_form" in kinds else None
+    awbs: List[str] = []
+    storage_company_name = ""
+
+    for shipment in shipments:
+        awb = shipment.awb
+        production_date = shipment.production_date
+        supplier = shipment.supplier
+        storage_company_name = _storage_company_name(shipment, storage_company_name)
+
+        if awb and awb not in awbs:
+            awbs.append(awb)
+
+        for item in shipment.shipment_items:
+            customer = item.customer
+            customer_name = customer.name if customer else "Unallocated"
+
+            if release is not None:
+                awb_group = release.setdefault(production_date, {}).setdefault(customer_name, {}).setdefault(
+                    awb, {"supplier": None, "items": []}
+                )
+                awb_group["supplier"] = supplier
+                awb_group["items"].append(item)
+
+            if collection is not None and customer:
+                collection.setdefault(production_date, {}).setdefault(customer_name, {}).setdefault(awb, []).append(item)
+
+            product = item.product
+
+            if customer_allocation is not None and product:
+                product_name = product.description or "Unknown Product"
+                customer_allocation.setdefault(production_date, {}).setdefault(product_name, []).append(item)
+
+    return {
+        "release": release,
+        "collection": collection,
+        "storage_company_name": storage_company_name,
+        "customer_allocation": customer_allocation,
+        "awbs": awbs,
+    }
+
+
+def count_items(groups: Any) -> int:
+    # Shipment items under any of the groupings above
+    if isinstance(groups, list):
+        return len(groups)
+
+    if isinstance(groups.get("items"), list):
+        return len(groups["items"])
+
+    return sum(count_items(value) for value in groups.values())
@@ -0,0 +1,317 @@
+import datetime
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from reportlab.platypus import Paragraph, Spacer, Table, CondPageBreak
+
+from app.classes.report import LOGO_MAX_SIZE, ReportTemplate, logo_placement
+from app.classes.spool import SpooledDocument, SpooledOutput
+from app.functions.aggregation import collection_frame, customer_allocation_frame, customer_allocation_summary, item_totals, release_frame, release_summary, table_totals
+from app.functions.styles import BREAKDOWN_TABLE_STYLE, CUSTOMER, DISPATCH, SUMMARY_TEXT, SUMMARY_TITLE
+from app.functions.table import build_collection_table, build_customer_allocation_table, build_release_table, build_shipment_allocation_summary_grid, build_shipment_allocation_table
+
+
+def warm_render_worker():
+    # Runs once per pool process so the first real job doesn't pay for imports or the logo resize
+    logo_placement(*LOGO_MAX_SIZE)
+
+
+def ping_render_worker() -> bool:
+    return True
+
+
+def _template_options(job: Dict[str, Any]) -> Dict[str, Any]:
+    generated_on = job.get("generated_on")
+
+    return {
+        "invariant": job.get("invariant", False),
+        "generated_on": datetime.date.fromisoformat(generated_on) if generated_on else None,
+    }
+
+
+def _render(
+    job: Dict[str, Any],
+    orientation: str,
+    build_elements: Callable[[ReportTemplate, Dict[str, Any]], List[Any]],
+) -> Tuple[SpooledDocument, int, Dict[str, float]]:
+    started = time.perf_counter()
+    output = SpooledOutput()
+    pdf = ReportTemplate(
+        output,
+        header_text=job["header_text"],
+        orientation=orientation,
+        **_template_options(job)
+    )
+
+    elements = build_elements(pdf, job)
+    laid_out = time.perf_counter()
+
+    pdf.build(elements)
+
+    # Timed in the worker process and returned with the result, since the
+    # metrics registry lives in the API process
+    timings = {"layout": laid_out - started, "pdf_build": time.perf_counter() - laid_out}
+
+    return output.document(), pdf.page, timings
+
+
+def _format_production_date(production_date: str) -> str:
+    return datetime.datetime.fromisoformat(
+        production_date.replace("Z", "+00:00")
+    ).strftime("%d %b %Y")
+
+
+def render_release_form(job: Dict[str, Any]) -> Tuple[SpooledDocument, int, Dict[str, float]]:
+    return _render(job, "portrait", release_form_elements)
+
+
+def release_form_elements(pdf: ReportTemplate, job: Dict[str, Any]) -> List[Any]:
+    elements: List[Any] = []
+    groups = job["groups"]
+
+    frame = release_frame(groups)
+    totals = table_totals(frame)
+    summary = release_summary(frame)
+    table_index = 0
+
+    for production_date, customers in groups.items():
+        elements.append(
+            Paragraph(f"For products dispatched on: {_format_production_date(production_date)}", DISPATCH)
+        )
+        elements.append(Spacer(1, 8))
+
+        for customer_name, awb_groups in customers.items():
+            elements.append(Paragraph(customer_name, CUSTOMER))
+            elements.append(Spacer(1, 6))
+
+            table = build_release_table(pdf, awb_groups, fast=job.get("fast_cells", False), totals=totals[table_index])
+            table_index += 1
+            elements.append(table)
+            elements.append(Spacer(1, 18))
+
+        elements.append(Spacer(1, 8))
+
+    elements.append(CondPageBreak(120))
+    elements.append(Paragraph("Summary", SUMMARY_TITLE))
+    elements.append(
+        Paragraph(
+            f"Total customers: {summary['total_customers']}",
+            SUMMARY_TEXT
+        )
+    )
+    elements.append(
+        Paragraph(
+            f"Total AWBs: {summary['total_awbs']}",
+            SUMMARY_TEXT
+        )
+    )
+    elements.append(
+        Paragraph(
+            f"Total boxes: {summary['total_boxes']}",
+            SUMMARY_TEXT
+        )
+    )
+    elements.append(
+        Paragraph(
+            f"Total weight: {summary['total_weight']:.2f} kg",
+            SUMMARY_TEXT
+        )
+    )
+
+    elements.append(Spacer(1, 12))
+    elements.append(Paragraph("Customer Breakdown", SUMMARY_TITLE))
+    elements.append(Spacer(1, 6))
+
+    summary_data = [[
+        Paragraph("Customer", CUSTOMER),
+        Paragraph("AWBs", CUSTOMER),
+        Paragraph("Boxes", CUSTOMER),
+        Paragraph("Weight (kg)", CUSTOMER),
+    ]]
+
+    for customer_name, customer_summary in summary["customers"].items():
+        summary_data.append([
+            Paragraph(customer_name, SUMMARY_TEXT),
+            Paragraph(str(customer_summary["awbs"]), SUMMARY_TEXT),
+            Paragraph(str(customer_summary["boxes"]), SUMMARY_TEXT),
+            Paragraph(f"{customer_summary['weight']:.2f}", SUMMARY_TEXT),
+        ])
+
+    summary_table = Table(summary_data, colWidths=[180, 70, 70, 90])
+    summary_table.setStyle(BREAKDOWN_TABLE_STYLE)
+    elements.append(summary_table)
+
+    return elements
+
+
+def render_shipment_allocation(job: Dict[str, Any]) -> Tuple[SpooledDocument, int, Dict[str, float]]:
+    return _render(job, "landscape", shipment_allocation_elements)
+
+
+def shipment_allocation_elements(pdf: ReportTemplate, job: Dict[str, Any]) -> List[Any]:
+    elements: List[Any] = []
+
+    summary_table = build_shipment_allocation_summary_grid(
+        pdf,
+        job["shipment_id"],
+        job["supplier"],
+        job["arrival_date"],
+        job["awb"],
+        job["country"],
+        job["production_date"],
+        job["storage_name"],
+        job["expiry_date"],
+    )
+    elements.append(summary_table)
+
+    elements.append(Spacer(1, 16))
+
+    shipment_items = job["shipment_items"]
+
+    table = build_shipment_allocation_table(
+        pdf,
+        shipment_items,
+        fast=job.get("fast_cells", False),
+        totals=item_totals(shipment_items),
+    )
+    elements.append(table)
+
+    return elements
+
+
+def render_collection_form(job: Dict[str, Any]) -> Tuple[SpooledDocument, int, Dict[str, float]]:
+    return _render(job, "portrait", collection_form_elements)
+
+
+def collection_form_elements(pdf: ReportTemplate, job: Dict[str, Any]) -> List[Any]:
+    elements: List[Any] = []
+    groups = job["groups"]
+    storage_company_name = job["storage_company_name"]
+
+    totals = table_totals(collection_frame(groups))
+    table_index = 0
+
+    for production_date, customers in groups.items():
+        elements.append(
+            Paragraph(f"For products dispatched on: {_format_production_date(production_date)}", DISPATCH)
+        )
+        elements.append(Spacer(1, 8))
+
+        for customer_name, awb_groups in customers.items():
+            elements.append(Paragraph(customer_name, CUSTOMER))
+            elements.append(Spacer(1, 6))
+
+            table = build_collection_table(
+                pdf,
+                storage_company_name,
+                awb_groups,
+                fast=job.get("fast_cells", False),
+                totals=totals[table_index],
+            )
+            table_index += 1
+            elements.append(table)
+            elements.append(Spacer(1, 18))
+
+        elements.append(Spacer(1, 8))
+
+    return elements
+
+
+def render_customer_allocation_form(job: Dict[str, Any]) -> Tuple[SpooledDocument, int, Dict[str, float]]:
+    return _render(job, "portrait", customer_allocation_form_elements)
+
+
+def customer_allocation_form_elements(pdf: ReportTemplate, job: Dict[str, Any]) -> List[Any]:
+    elements: List[Any] = []
+    groups = job["groups"]
+
+    frame = customer_allocation_frame(groups)
+    totals = table_totals(frame)
+    summary = customer_allocation_summary(frame, job["awbs"])
+    table_index = 0
+
+    for production_date in sorted(groups.keys()):
+        products = groups[production_date]
+
+        elements.append(
+            Paragraph(f"For products dispatched on: {_format_production_date(production_date)}", DISPATCH)
+        )
+        elements.append(Spacer(1, 8))
+
+        for product_name in sorted(products.keys()):
+            product_items = products[product_name]
+
+            table = build_customer_allocation_table(
+                pdf,
+                (product_name, product_items),
+                fast=job.get("fast_cells", False),
+                totals=totals[table_index],
+            )
+            table_index += 1
+            elements.append(table)
+            elements.append(Spacer(1, 18))
+
+        elements.append(Spacer(1, 8))
+
+    if elements and isinstance(elements[-1], Spacer):
+        elements.pop()
+
+    elements.append(CondPageBreak(140))
+    elements.append(Paragraph("Summary", SUMMARY_TITLE))
+    elements.append(
+        Paragraph(
+            f"Total AWBs: {summary['total_awbs']}",
+            SUMMARY_TEXT
+        )
+    )
+    elements.append(
+        Paragraph(
+            f"Total products: {summary['total_products']}",
+            SUMMARY_TEXT
+        )
+    )
+    elements.append(
+        Paragraph(
+            f"Total boxes: {summary['total_boxes']}",
+            SUMMARY_TEXT
+        )
+    )
+    elements.append(
+        Paragraph(
+            f"Total weight: {summary['total_weight']:.2f} kg",
+            SUMMARY_TEXT
+        )
+    )
+
+    elements.append(Spacer(1, 12))
+    elements.append(Paragraph("Product Breakdown", SUMMARY_TITLE))
+    elements.append(Spacer(1, 6))
+
+    summary_data = [[
+        Paragraph("Product", CUSTOMER),
+        Paragraph("Boxes", CUSTOMER),
+        Paragraph("Weight (kg)", CUSTOMER),
+    ]]
+
+    for product_name, product_summary in summary["products"].items():
+        summary_data.append([
+            Paragraph(product_name, SUMMARY_TEXT),
+            Paragraph(str(product_summary["boxes"]), SUMMARY_TEXT),
+            Paragraph(f"{product_summary['weight']:.2f}", SUMMARY_TEXT),
+        ])
+
+    summary_table = Table(summary_data, colWidths=[300, 80, 100])
+    summary_table.setStyle(BREAKDOWN_TABLE_STYLE)
+    elements.append(summary_table)
+
+    return elements
+
+
+# Orientation and element builder per report kind, for callers that time
+# layout and pdf.build separately
+REPORT_LAYOUTS = {
+    "release_form": ("portrait", release_form_elements),
+    "shipment_allocation": ("landscape", shipment_allocation_elements),
+    "collection_form": ("portrait", collection_form_elements),
+    "customer_allocation_form": ("portrait", customer_allocation_form_elements),
+}
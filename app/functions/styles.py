@@ -0,0 +1,148 @@
+from reportlab.lib import colors
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.platypus import TableStyle
+
+# Built once per process and shared by every report. Treat these as read-only:
+# clone a style before changing it rather than mutating the shared instance.
+
+STYLESHEET = getSampleStyleSheet()
+
+_normal = STYLESHEET["Normal"]
+
+
+def _style(name: str, parent: ParagraphStyle = _normal, **attrs) -> ParagraphStyle:
+    return parent.clone(name, **attrs)
+
+
+# Table cells
+TABLE_NORMAL = _style("tbl_normal", fontSize=9, leading=11)
+TABLE_HEADER = _style("tbl_header", fontName="Helvetica-Bold", fontSize=9, leading=11)
+TABLE_FOOTER = _style("tbl_footer", fontName="Helvetica-Bold", fontSize=9, leading=11)
+TABLE_SMALL = _style("small_style", parent=TABLE_NORMAL, fontSize=8, textColor=colors.grey)
+SUPPLIER = _style(
+    "supplier_style",
+    fontName="Helvetica-Oblique",
+    fontSize=8,
+    leading=10,
+    textColor=colors.grey,
+)
+
+# Document body
+DISPATCH = _style(
+    "dispatch_style",
+    fontName="Helvetica-Bold",
+    fontSize=8,
+    leftIndent=0,
+    firstLineIndent=0,
+    spaceBefore=0,
+    spaceAfter=8,
+)
+CUSTOMER = _style(
+    "customer_style",
+    fontName="Helvetica-Bold",
+    fontSize=10,
+    leftIndent=0,
+    firstLineIndent=0,
+    spaceBefore=0,
+    spaceAfter=6,
+)
+SUMMARY_TITLE = _style(
+    "summary_title_style",
+    fontName="Helvetica-Bold",
+    fontSize=11,
+    leading=13,
+    spaceBefore=8,
+    spaceAfter=8,
+)
+SUMMARY_TEXT = _style(
+    "summary_text_style",
+    fontName="Helvetica",
+    fontSize=9,
+    leading=11,
+    spaceBefore=0,
+    spaceAfter=4,
+)
+
+
+def _report_table_style(align_from: int, align_to: int, totals: bool = True) -> TableStyle:
+    commands = [
+        ("GRID", (0, 0), (-1, -1), 1, colors.transparent),
+        ("BACKGROUND", (0, 0), (-1, 0), colors.transparent),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ("LEFTPADDING", (0, 0), (-1, -1), 3),
+        ("RIGHTPADDING", (0, 0), (-1, -1), 3),
+        ("TOPPADDING", (0, 0), (-1, -1), 2),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 2),
+    ]
+
+    if totals:
+        commands += [
+            ("BACKGROUND", (0, -1), (-1, -1), colors.whitesmoke),
+            ("LINEABOVE", (0, -1), (-1, -1), 1.0, colors.grey),
+        ]
+
+    commands.append(("ALIGN", (align_from, 1), (align_to, -1), "RIGHT"))
+
+    return TableStyle(commands)
+
+
+# Fast cell mode: plain string cells take their font from the table instead
+# of a Paragraph, matching TABLE_NORMAL for the body and TABLE_FOOTER for totals.
+# The ALIGN RIGHT in the parent styles never applied to Paragraph cells, so
+# string cells are left aligned to match.
+FAST_CELL_COMMANDS = [
+    ("FONT", (0, 0), (-1, -1), "Helvetica", 9, 11),
+    ("ALIGN", (0, 0), (-1, -1), "LEFT"),
+]
+FAST_TOTALS_COMMANDS = FAST_CELL_COMMANDS + [
+    ("FONT", (0, -1), (-1, -1), "Helvetica-Bold", 9, 11),
+]
+
+# The *_BODY_STYLE variants are for chunks of a long table that end before
+# the totals row, so their last row isn't styled as totals
+RELEASE_TABLE_STYLE = _report_table_style(4, 5)
+RELEASE_TABLE_BODY_STYLE = _report_table_style(4, 5, totals=False)
+RELEASE_TABLE_FAST_STYLE = TableStyle(FAST_TOTALS_COMMANDS, parent=RELEASE_TABLE_STYLE)
+RELEASE_TABLE_FAST_BODY_STYLE = TableStyle(FAST_CELL_COMMANDS, parent=RELEASE_TABLE_BODY_STYLE)
+
+REPORT_TABLE_STYLE = _report_table_style(3, 4)
+REPORT_TABLE_BODY_STYLE = _report_table_style(3, 4, totals=False)
+REPORT_TABLE_FAST_STYLE = TableStyle(FAST_TOTALS_COMMANDS, parent=REPORT_TABLE_STYLE)
+REPORT_TABLE_FAST_BODY_STYLE = TableStyle(FAST_CELL_COMMANDS, parent=REPORT_TABLE_BODY_STYLE)
+
+LEGACY_RELEASE_TABLE_STYLE = TableStyle([
+    ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+    ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+    ("VALIGN", (0, 0), (-1, -1), "TOP"),
+
+    ("LEFTPADDING", (0, 0), (-1, -1), 3),
+    ("RIGHTPADDING", (0, 0), (-1, -1), 3),
+    ("TOPPADDING", (0, 0), (-1, -1), 2),
+    ("BOTTOMPADDING", (0, 0), (-1, -1), 2),
+
+    # Style AWB totals row
+    ("BACKGROUND", (0, -1), (-1, -1), colors.whitesmoke),
+    ("LINEABOVE", (0, -1), (-1, -1), 1.0, colors.grey),
+    ("ALIGN", (3, 1), (4, -1), "RIGHT"),
+])
+
+SUMMARY_GRID_STYLE = TableStyle([
+    ("GRID", (0, 0), (-1, -1), 0.5, colors.transparent),
+    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+    ("LEFTPADDING", (0, 0), (-1, -1), 1),
+    ("RIGHTPADDING", (0, 0), (-1, -1), 1),
+    ("TOPPADDING", (0, 0), (-1, -1), 2),
+    ("BOTTOMPADDING", (0, 0), (-1, -1), 2),
+])
+
+BREAKDOWN_TABLE_STYLE = TableStyle([
+    ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#EAEAEA")),
+    ("TEXTCOLOR", (0, 0), (-1, 0), colors.black),
+    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+    ("FONTSIZE", (0, 0), (-1, -1), 9),
+    ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
+    ("ALIGN", (1, 1), (-1, -1), "CENTER"),
+    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+    ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
+    ("TOPPADDING", (0, 0), (-1, 0), 6),
+])
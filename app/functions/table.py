@@ -1,139 +1,175 @@
-from typing import Dict, List, Any, Tuple
-from reportlab.platypus import Paragraph, Table, TableStyle
-from reportlab.lib import colors
+from typing import Dict, Iterable, Iterator, List, Any, Optional, Tuple
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import Paragraph, Table
 
 from app.classes.report import ReportTemplate
+from app.classes.table import ChunkedTable
+from app.functions.aggregation import item_totals
+from app.functions.styles import (
+    LEGACY_RELEASE_TABLE_STYLE,
+    RELEASE_TABLE_BODY_STYLE,
+    RELEASE_TABLE_FAST_BODY_STYLE,
+    RELEASE_TABLE_FAST_STYLE,
+    RELEASE_TABLE_STYLE,
+    REPORT_TABLE_BODY_STYLE,
+    REPORT_TABLE_FAST_BODY_STYLE,
+    REPORT_TABLE_FAST_STYLE,
+    REPORT_TABLE_STYLE,
+    SUMMARY_GRID_STYLE,
+    SUPPLIER,
+    TABLE_FOOTER,
+    TABLE_HEADER,
+    TABLE_NORMAL,
+    TABLE_SMALL,
+)
+from app.models.report import ShipmentItem
 from app.utils import format_date, to_float, to_number
 
-def build_release_table(
-    pdf_doc: ReportTemplate,
-    awb_groups: Dict[str, Dict[str, Any]]
-):
-    frame_w = pdf_doc.frame.width
+def _cell(text: str, style, fast: bool):
+    # Fast mode leaves single-line cells as plain strings; the table's FONT
+    # commands style them and ReportLab skips the Paragraph parse and wrap
+    return text if fast else Paragraph(text, style)
 
-    normal = pdf_doc.styles["Normal"].clone("tbl_normal")
-    normal.fontSize = 9
-    normal.leading = 11
-    
-    supplier_style = pdf_doc.styles["Normal"].clone("supplier_style")
-    supplier_style.fontName = "Helvetica-Oblique"  # italic
-    supplier_style.fontSize = 8
-    supplier_style.leading = 10
-    supplier_style.textColor = colors.grey
-
-    header = pdf_doc.styles["Normal"].clone("tbl_header")
-    header.fontName = "Helvetica-Bold"
-    header.fontSize = 9
-    header.leading = 11
-
-    footer = pdf_doc.styles["Normal"].clone("tbl_footer")
-    footer.fontName = "Helvetica-Bold"
-    footer.fontSize = 9
-    footer.leading = 11
+# LEFTPADDING + RIGHTPADDING in the report table styles
+CELL_PADDING = 6
 
-    col_fracs = [0.16, 0.18, 0.46, 0.10, 0.10]
-    col_widths = [frame_w * f for f in col_fracs]
+def _fit_fast_row(row: List[Any], col_widths: List[float], style) -> List[Any]:
+    # Plain strings never wrap, so any fast cell wider than its column goes
+    # back to a Paragraph and wraps exactly as it would outside fast mode
+    for column, cell in enumerate(row):
+        if (
+            isinstance(cell, str)
+            and cell
+            and stringWidth(cell, style.fontName, style.fontSize) > col_widths[column] - CELL_PADDING
+        ):
+            row[column] = Paragraph(cell, style)
 
-    data: List[List[Any]] = [[
-        Paragraph("AWB", header),
-        Paragraph("Transport Company", header),
-        Paragraph("Product", header),
-        Paragraph("Box", header),
-        Paragraph("Weight", header),
-    ]]
+    return row
 
-    total_box_number = 0
-    total_customer_weight = 0.0
+def _fit_fast_rows(rows: Iterable[List[Any]], col_widths: List[float]) -> Iterator[List[Any]]:
+    # The last row is the totals row
+    previous = None
 
-    for awb, awb_data in awb_groups.items():
-        supplier = awb_data.get("supplier")
-        items = awb_data.get("items", [])
+    for row in rows:
+        if previous is not None:
+            yield _fit_fast_row(previous, col_widths, TABLE_NORMAL)
 
-        for index, item in enumerate(items):
-            weight = float(item.get("net_weight") or 0)
-
-            if index == 0:
-                data.append([
-                    Paragraph(str(awb or ""), normal),
-                    Paragraph("", normal),
-                    Paragraph("", normal),
-                    Paragraph("", normal),
-                    Paragraph("", normal),
-                ])
-
-                data.append([
-                    Paragraph(f"{supplier or ''}", supplier_style),
-                    Paragraph("", normal),
-                    Paragraph("", normal),
-                    Paragraph("", normal),
-                    Paragraph("", normal),
-                ])
+        previous = row
 
-            data.append([
-                Paragraph("", normal), 
-                Paragraph(str((item.get("transportCompany") or {}).get("name", "") or ""), normal),
-                Paragraph(str(item.get("product", {}).get("description", "") or ""), normal),
-                Paragraph(str(item.get("box_number", "") or ""), normal),
-                Paragraph(f"{weight:.2f}", normal),
-            ])
+    if previous is not None:
+        yield _fit_fast_row(previous, col_widths, TABLE_FOOTER)
 
-            total_box_number += 1
-            total_customer_weight += weight
+def _fit_fast_cells(data: List[List[Any]], col_widths: List[float]) -> None:
+    data[1:] = _fit_fast_rows(data[1:], col_widths)
 
-    data.append([
-        Paragraph("Totals", footer),
-        Paragraph("", footer),
-        Paragraph("", footer),
-        Paragraph(str(total_box_number), footer),
-        Paragraph(f"{total_customer_weight:.2f}kg", footer),
-    ])
+def build_release_table(
+    pdf_doc: ReportTemplate,
+    awb_groups: Dict[str, Dict[str, Any]],
+    fast: bool = False,
+    chunked: bool = True,
+    totals: Optional[Dict[str, float]] = None,
+):
+    frame_w = pdf_doc.frame.width
+
+    col_fracs = [0.16, 0.18, 0.46, 0.10, 0.10]
+    col_widths = [frame_w * f for f in col_fracs]
 
-    last_row = len(data) - 1
+    header: List[Any] = [
+        Paragraph("AWB", TABLE_HEADER),
+        Paragraph("Transport Company", TABLE_HEADER),
+        Paragraph("Product", TABLE_HEADER),
+        Paragraph("Box", TABLE_HEADER),
+        Paragraph("Weight", TABLE_HEADER),
+    ]
+
+    if totals is None:
+        totals = item_totals(item for awb_data in awb_groups.values() for item in awb_data["items"])
+
+    def rows():
+        # Built as the layout asks for them, so a chunked table never holds
+        # more than a page of row flowables
+        for awb, awb_data in awb_groups.items():
+            supplier = awb_data.get("supplier")
+            items = awb_data.get("items", [])
+
+            for index, item in enumerate(items):
+                weight = float(item.net_weight or 0)
+
+                if index == 0:
+                    yield [
+                        _cell(str(awb or ""), TABLE_NORMAL, fast),
+                        _cell("", TABLE_NORMAL, fast),
+                        _cell("", TABLE_NORMAL, fast),
+                        _cell("", TABLE_NORMAL, fast),
+                        _cell("", TABLE_NORMAL, fast),
+                    ]
+
+                    yield [
+                        Paragraph(f"{supplier or ''}", SUPPLIER),
+                        _cell("", TABLE_NORMAL, fast),
+                        _cell("", TABLE_NORMAL, fast),
+                        _cell("", TABLE_NORMAL, fast),
+                        _cell("", TABLE_NORMAL, fast),
+                    ]
+
+                yield [
+                    _cell("", TABLE_NORMAL, fast), 
+                    Paragraph(str(item.transportCompany.name or "" if item.transportCompany else ""), TABLE_NORMAL),
+                    Paragraph(str(item.product.description or "" if item.product else ""), TABLE_NORMAL),
+                    _cell(str(item.box_number or ""), TABLE_NORMAL, fast),
+                    _cell(f"{weight:.2f}", TABLE_NORMAL, fast),
+                ]
+
+        yield [
+            _cell("Totals", TABLE_FOOTER, fast),
+            _cell("", TABLE_FOOTER, fast),
+            _cell("", TABLE_FOOTER, fast),
+            _cell(str(totals["boxes"]), TABLE_FOOTER, fast),
+            _cell(f"{totals['net_weight']:.2f}kg", TABLE_FOOTER, fast),
+        ]
+
+    body = _fit_fast_rows(rows(), col_widths) if fast else rows()
+    style = RELEASE_TABLE_FAST_STYLE if fast else RELEASE_TABLE_STYLE
+
+    if chunked:
+        return ChunkedTable(
+            header,
+            body,
+            col_widths,
+            style,
+            RELEASE_TABLE_FAST_BODY_STYLE if fast else RELEASE_TABLE_BODY_STYLE,
+            hAlign="CENTER",
+        )
 
     table = Table(
-        data,
+        [header, *body],
         colWidths=col_widths,
         hAlign="CENTER",
         repeatRows=1,
     )
 
-    table.setStyle(TableStyle([
-        ("GRID", (0, 0), (-1, -1), 1, colors.transparent),
-        ("BACKGROUND", (0, 0), (-1, 0), colors.transparent),
-        ("VALIGN", (0, 0), (-1, -1), "TOP"),
-        ("LEFTPADDING", (0, 0), (-1, -1), 3),
-        ("RIGHTPADDING", (0, 0), (-1, -1), 3),
-        ("TOPPADDING", (0, 0), (-1, -1), 2),
-        ("BOTTOMPADDING", (0, 0), (-1, -1), 2),
-        ("BACKGROUND", (0, last_row), (-1, last_row), colors.whitesmoke),
-        ("LINEABOVE", (0, last_row), (-1, last_row), 1.0, colors.grey),
-        ("ALIGN", (4, 1), (5, -1), "RIGHT"),
-    ]))
+    table.setStyle(style)
 
     return table
 
 def build_shipment_allocation_summary_grid(pdf_doc, shipment_id, supplier_name, arrival_date, awb, country, production_date, storage_location, expiry_date):
     width = pdf_doc.frame.width
-    styles = pdf_doc.styles
-    normal = styles["Normal"].clone("grid_normal")
-    normal.fontSize = 9
-    normal.leading = 11
 
     data = [
         [
-            Paragraph(f"<b>Shipment ID:</b> {shipment_id}", normal),
-            Paragraph(f"<b>Supplier:</b> {supplier_name}", normal),
-            Paragraph(f"<b>Arrival Date:</b> {format_date(arrival_date)}", normal),
+            Paragraph(f"<b>Shipment ID:</b> {shipment_id}", TABLE_NORMAL),
+            Paragraph(f"<b>Supplier:</b> {supplier_name}", TABLE_NORMAL),
+            Paragraph(f"<b>Arrival Date:</b> {format_date(arrival_date)}", TABLE_NORMAL),
         ],
         [
-            Paragraph(f"<b>AWB:</b> {awb}", normal),
-            Paragraph(f"<b>Country:</b> {country}", normal),
-            Paragraph(f"<b>Production Date:</b> {format_date(production_date)}", normal),
+            Paragraph(f"<b>AWB:</b> {awb}", TABLE_NORMAL),
+            Paragraph(f"<b>Country:</b> {country}", TABLE_NORMAL),
+            Paragraph(f"<b>Production Date:</b> {format_date(production_date)}", TABLE_NORMAL),
         ],
         [
-            Paragraph("", normal),
-            Paragraph(f"<b>Storage Location:</b> {storage_location}", normal),
-            Paragraph(f"<b>Expiry Date:</b> {format_date(expiry_date)}", normal),
+            Paragraph("", TABLE_NORMAL),
+            Paragraph(f"<b>Storage Location:</b> {storage_location}", TABLE_NORMAL),
+            Paragraph(f"<b>Expiry Date:</b> {format_date(expiry_date)}", TABLE_NORMAL),
         ],
     ]
 
@@ -142,152 +178,118 @@ def build_shipment_allocation_summary_grid(pdf_doc, shipment_id, supplier_name,
         colWidths=[width / 3] * 3,
     )
 
-    table.setStyle(TableStyle([
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.transparent),
-        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-        ("LEFTPADDING", (0, 0), (-1, -1), 1),
-        ("RIGHTPADDING", (0, 0), (-1, -1), 1),
-        ("TOPPADDING", (0, 0), (-1, -1), 2),
-        ("BOTTOMPADDING", (0, 0), (-1, -1), 2),
-    ]))
+    table.setStyle(SUMMARY_GRID_STYLE)
 
     return table
 
 def build_shipment_allocation_table(
     pdf_doc: ReportTemplate,
-    shipment_items: Dict[str, List[Dict[str, Any]]]
+    shipment_items: List[ShipmentItem],
+    fast: bool = False,
+    chunked: bool = True,
+    totals: Optional[Dict[str, float]] = None,
 ):
     frame_w = pdf_doc.frame.width
 
-    normal = pdf_doc.styles["Normal"].clone("tbl_normal")
-    normal.fontSize = 9
-    normal.leading = 11
-
-    header = pdf_doc.styles["Normal"].clone("tbl_header")
-    header.fontName = "Helvetica-Bold"
-    header.fontSize = 9
-    header.leading = 11
-    
-    small_style = normal.clone("small_style")
-    small_style.fontSize = 8
-    small_style.textColor = colors.grey
-
-    footer = pdf_doc.styles["Normal"].clone("tbl_footer")
-    footer.fontName = "Helvetica-Bold"
-    footer.fontSize = 9
-    footer.leading = 11
-
     col_fracs = [0.05, 0.40, 0.10, 0.05, 0.05, 0.10, 0.10, 0.10, 0.05]
     col_widths = [frame_w * f for f in col_fracs]
 
-    data: List[List[Any]] = [[
-        Paragraph("Box No", header),
-        Paragraph("Product/Customer", header),
-        Paragraph("Currency", header),
-        Paragraph("Rate", header),
-        Paragraph("Net Weight", header),
-        Paragraph("Pieces Per Box", header),
-        Paragraph("Price Per Kilo", header),
-        Paragraph("Transport Company", header),
-        Paragraph("Price", header)
-    ]]
-
-    for item in shipment_items:
-        price = to_number(item.get("price"))
-        net_weight = to_number(item.get("net_weight"))
-        pieces_per_box = to_number(item.get("pieces_per_box"))
-
-        data.append([
-            Paragraph(str(item.get("box_number") or ""), normal),
-            [
-                Paragraph((item.get("product") or {}).get("description", ""), normal),
-                Paragraph((item.get("customer") or {}).get("name") or "Unallocated", small_style)
-            ],
-            Paragraph(str(item.get("currency") or ""), normal),
-            Paragraph(str(item.get("rate") or ""), normal),
-            Paragraph(f"{net_weight:.2f}kg", normal),
-            Paragraph(str(int(pieces_per_box)) if pieces_per_box else "", normal),
-            Paragraph(str(item.get("todays_price_per_kilo") or ""), normal),
-            Paragraph((item.get("transport_companies") or {}).get("name") or "-", normal),
-            Paragraph(f"£{price:.2f}", normal),
-        ])
-    
-    total_weight = sum(to_number(item.get("net_weight")) for item in shipment_items)
-    total_pieces_per_box = sum(to_number(item.get("pieces_per_box")) for item in shipment_items)
-    total_price = sum(to_number(item.get("price")) for item in shipment_items)
-    
-    data.append([
-        Paragraph(f"{len(shipment_items)}", footer),
-        Paragraph("", footer),
-        Paragraph("", footer),
-        Paragraph("", footer),
-        Paragraph(f"{total_weight:.2f}kg", footer),
-        Paragraph(f"{int(total_pieces_per_box)}", footer),
-        Paragraph("", footer),
-        Paragraph("", footer),
-        Paragraph(f"£{total_price:.2f}", footer)
-    ])
+    header: List[Any] = [
+        Paragraph("Box No", TABLE_HEADER),
+        Paragraph("Product/Customer", TABLE_HEADER),
+        Paragraph("Currency", TABLE_HEADER),
+        Paragraph("Rate", TABLE_HEADER),
+        Paragraph("Net Weight", TABLE_HEADER),
+        Paragraph("Pieces Per Box", TABLE_HEADER),
+        Paragraph("Price Per Kilo", TABLE_HEADER),
+        Paragraph("Transport Company", TABLE_HEADER),
+        Paragraph("Price", TABLE_HEADER)
+    ]
 
-    last_row = len(data) - 1
+    if totals is None:
+        totals = item_totals(shipment_items)
+
+    def rows():
+        # Built as the layout asks for them, so a chunked table never holds
+        # more than a page of row flowables
+        for item in shipment_items:
+            price = to_number(item.price)
+            net_weight = to_number(item.net_weight)
+            pieces_per_box = to_number(item.pieces_per_box)
+
+            yield [
+                _cell(str(item.box_number or ""), TABLE_NORMAL, fast),
+                [
+                    Paragraph(item.product.description or "" if item.product else "", TABLE_NORMAL),
+                    Paragraph(item.customer.name or "Unallocated" if item.customer else "Unallocated", TABLE_SMALL)
+                ],
+                _cell(str(item.currency or ""), TABLE_NORMAL, fast),
+                _cell(str(item.rate or ""), TABLE_NORMAL, fast),
+                _cell(f"{net_weight:.2f}kg", TABLE_NORMAL, fast),
+                _cell(str(int(pieces_per_box)) if pieces_per_box else "", TABLE_NORMAL, fast),
+                _cell(str(item.todays_price_per_kilo or ""), TABLE_NORMAL, fast),
+                Paragraph(item.transport_companies.name or "-" if item.transport_companies else "-", TABLE_NORMAL),
+                _cell(f"£{price:.2f}", TABLE_NORMAL, fast),
+            ]
+        
+        yield [
+            _cell(f"{totals['boxes']}", TABLE_FOOTER, fast),
+            _cell("", TABLE_FOOTER, fast),
+            _cell("", TABLE_FOOTER, fast),
+            _cell("", TABLE_FOOTER, fast),
+            _cell(f"{totals['net_weight']:.2f}kg", TABLE_FOOTER, fast),
+            _cell(f"{int(totals['pieces_per_box'])}", TABLE_FOOTER, fast),
+            _cell("", TABLE_FOOTER, fast),
+            _cell("", TABLE_FOOTER, fast),
+            _cell(f"£{totals['price']:.2f}", TABLE_FOOTER, fast)
+        ]
+
+    body = _fit_fast_rows(rows(), col_widths) if fast else rows()
+    style = REPORT_TABLE_FAST_STYLE if fast else REPORT_TABLE_STYLE
+
+    if chunked:
+        return ChunkedTable(
+            header,
+            body,
+            col_widths,
+            style,
+            REPORT_TABLE_FAST_BODY_STYLE if fast else REPORT_TABLE_BODY_STYLE,
+            hAlign="CENTER",
+        )
 
     table = Table(
-        data,
+        [header, *body],
         colWidths=col_widths,
         hAlign="CENTER",
         repeatRows=1,
     )
     
-    table.setStyle(TableStyle([
-        ("GRID", (0, 0), (-1, -1), 1, colors.transparent),
-        ("BACKGROUND", (0, 0), (-1, 0), colors.transparent),
-        ("VALIGN", (0, 0), (-1, -1), "TOP"),
-        ("LEFTPADDING", (0, 0), (-1, -1), 3),
-        ("RIGHTPADDING", (0, 0), (-1, -1), 3),
-        ("TOPPADDING", (0, 0), (-1, -1), 2),
-        ("BOTTOMPADDING", (0, 0), (-1, -1), 2),
-        ("BACKGROUND", (0, last_row), (-1, last_row), colors.whitesmoke),
-        ("LINEABOVE", (0, last_row), (-1, last_row), 1.0, colors.grey),
-        ("ALIGN", (3, 1), (4, -1), "RIGHT"),
-    ]))
+    table.setStyle(style)
 
     return table
 
 def build_release_table_legacy(
     pdf_doc: ReportTemplate,
     awb: str,
-    rows: List[Dict[str, Any]]
+    rows: List[ShipmentItem]
 ) -> Tuple[Table, int, float]:
     frame_w = pdf_doc.frame.width
 
-    normal = pdf_doc.styles["Normal"].clone("tbl_normal")
-    normal.fontSize = 9
-    normal.leading = 11
-
-    header = pdf_doc.styles["Normal"].clone("tbl_header")
-    header.fontName = "Helvetica-Bold"
-    header.fontSize = 9
-    header.leading = 11
-
-    footer = pdf_doc.styles["Normal"].clone("tbl_footer")
-    footer.fontName = "Helvetica-Bold"
-    footer.fontSize = 9
-    footer.leading = 11
-
     data: List[List[Any]] = [[
-        Paragraph("AWB", header),
-        Paragraph("Transport Company", header),
-        Paragraph("Product", header),
-        Paragraph("Box No", header),
-        Paragraph("Weight", header),
+        Paragraph("AWB", TABLE_HEADER),
+        Paragraph("Transport Company", TABLE_HEADER),
+        Paragraph("Product", TABLE_HEADER),
+        Paragraph("Box No", TABLE_HEADER),
+        Paragraph("Weight", TABLE_HEADER),
     ]]
 
     total_weight = 0.0
 
     for r in rows or []:
-        transport_name = (r.get("transport_company") or {}).get("name") or ""
-        product_name = (r.get("product") or {}).get("name") or ""
-        box_number = r.get("box_number") or ""
-        net_weight = r.get("net_weight") or 0
+        transport_name = (r.transport_company.name if r.transport_company else None) or ""
+        product_name = (r.product.name if r.product else None) or ""
+        box_number = r.box_number or ""
+        net_weight = r.net_weight or 0
 
         try:
             total_weight += float(net_weight)
@@ -295,22 +297,22 @@ def build_release_table_legacy(
             pass
 
         data.append([
-            Paragraph(str(awb), normal),
-            Paragraph(str(transport_name), normal),
-            Paragraph(str(product_name), normal),
-            Paragraph(str(box_number), normal),
-            Paragraph(str(net_weight), normal),
+            Paragraph(str(awb), TABLE_NORMAL),
+            Paragraph(str(transport_name), TABLE_NORMAL),
+            Paragraph(str(product_name), TABLE_NORMAL),
+            Paragraph(str(box_number), TABLE_NORMAL),
+            Paragraph(str(net_weight), TABLE_NORMAL),
         ])
 
     total_rows = len(rows or [])
 
     # AWB footer row
     data.append([
-        Paragraph("Total", footer),
-        Paragraph("", footer),
-        Paragraph("", footer),
-        Paragraph(f"{total_rows}", footer),
-        Paragraph(f"{total_weight:.2f}kg", footer),
+        Paragraph("Total", TABLE_FOOTER),
+        Paragraph("", TABLE_FOOTER),
+        Paragraph("", TABLE_FOOTER),
+        Paragraph(f"{total_rows}", TABLE_FOOTER),
+        Paragraph(f"{total_weight:.2f}kg", TABLE_FOOTER),
     ])
 
     col_fracs = [0.20, 0.20, 0.40, 0.10, 0.10]
@@ -323,83 +325,53 @@ def build_release_table_legacy(
         repeatRows=1,
     )
 
-    last_row = len(data) - 1
-
-    table.setStyle(TableStyle([
-        ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-        ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
-        ("VALIGN", (0, 0), (-1, -1), "TOP"),
-
-        ("LEFTPADDING", (0, 0), (-1, -1), 3),
-        ("RIGHTPADDING", (0, 0), (-1, -1), 3),
-        ("TOPPADDING", (0, 0), (-1, -1), 2),
-        ("BOTTOMPADDING", (0, 0), (-1, -1), 2),
-
-        # Style AWB totals row
-        ("BACKGROUND", (0, last_row), (-1, last_row), colors.whitesmoke),
-        ("LINEABOVE", (0, last_row), (-1, last_row), 1.0, colors.grey),
-        ("ALIGN", (3, 1), (4, -1), "RIGHT"),
-    ]))
+    table.setStyle(LEGACY_RELEASE_TABLE_STYLE)
 
     return table, total_rows, total_weight
 
 def build_collection_table(
     pdf_doc: ReportTemplate,
     storage_company_name: str,
-    awb_groups: Dict[str, List[Dict[str, Any]]]
+    awb_groups: Dict[str, List[ShipmentItem]],
+    fast: bool = False,
+    totals: Optional[Dict[str, float]] = None,
 ):
     frame_w = pdf_doc.frame.width
 
-    normal = pdf_doc.styles["Normal"].clone("tbl_normal")
-    normal.fontSize = 9
-    normal.leading = 11
-
-    header = pdf_doc.styles["Normal"].clone("tbl_header")
-    header.fontName = "Helvetica-Bold"
-    header.fontSize = 9
-    header.leading = 11
-
-    footer = pdf_doc.styles["Normal"].clone("tbl_footer")
-    footer.fontName = "Helvetica-Bold"
-    footer.fontSize = 9
-    footer.leading = 11
-
     col_fracs = [0.25, 0.25, 0.25, 0.25]
     col_widths = [frame_w * f for f in col_fracs]
 
     data: List[List[Any]] = [[
-        Paragraph("AWB", header),
-        Paragraph("Collection Point", header),
-        Paragraph("Box", header),
-        Paragraph("Weight", header)
+        Paragraph("AWB", TABLE_HEADER),
+        Paragraph("Collection Point", TABLE_HEADER),
+        Paragraph("Box", TABLE_HEADER),
+        Paragraph("Weight", TABLE_HEADER)
     ]]
 
-    total_box_number = 0
-    total_customer_weight = 0.0
+    if totals is None:
+        totals = item_totals(item for items in awb_groups.values() for item in items)
 
     for awb, items in awb_groups.items():
         for index, item in enumerate(items):
             awb_header = awb if index == 0 else ""
-            weight = float(item.get("net_weight") or 0)
+            weight = float(item.net_weight or 0)
 
             data.append([
-                Paragraph(str(awb_header or ""), normal),
-                Paragraph(storage_company_name, normal),
-                Paragraph(str(item.get("box_number", "") or ""), normal),
-                Paragraph(f"{weight:.2f}", normal),
+                _cell(str(awb_header or ""), TABLE_NORMAL, fast),
+                Paragraph(storage_company_name, TABLE_NORMAL),
+                _cell(str(item.box_number or ""), TABLE_NORMAL, fast),
+                _cell(f"{weight:.2f}", TABLE_NORMAL, fast),
             ])
 
-            total_box_number += 1
-            total_customer_weight += weight
-
     data.append([
-        Paragraph("Totals", footer),
-        Paragraph("", footer),
-        Paragraph(str(total_box_number), footer),
-        Paragraph(f"{total_customer_weight:.2f}kg", footer),
+        _cell("Totals", TABLE_FOOTER, fast),
+        _cell("", TABLE_FOOTER, fast),
+        _cell(str(totals["boxes"]), TABLE_FOOTER, fast),
+        _cell(f"{totals['net_weight']:.2f}kg", TABLE_FOOTER, fast),
     ])
 
-    last_row = len(data) - 1
+    if fast:
+        _fit_fast_cells(data, col_widths)
 
     table = Table(
         data,
@@ -408,94 +380,65 @@ def build_collection_table(
         repeatRows=1,
     )
 
-    table.setStyle(TableStyle([
-        ("GRID", (0, 0), (-1, -1), 1, colors.transparent),
-        ("BACKGROUND", (0, 0), (-1, 0), colors.transparent),
-        ("VALIGN", (0, 0), (-1, -1), "TOP"),
-        ("LEFTPADDING", (0, 0), (-1, -1), 3),
-        ("RIGHTPADDING", (0, 0), (-1, -1), 3),
-        ("TOPPADDING", (0, 0), (-1, -1), 2),
-        ("BOTTOMPADDING", (0, 0), (-1, -1), 2),
-        ("BACKGROUND", (0, last_row), (-1, last_row), colors.whitesmoke),
-        ("LINEABOVE", (0, last_row), (-1, last_row), 1.0, colors.grey),
-        ("ALIGN", (3, 1), (4, -1), "RIGHT"),
-    ]))
+    table.setStyle(REPORT_TABLE_FAST_STYLE if fast else REPORT_TABLE_STYLE)
 
     return table
 
 def build_customer_allocation_table(
     pdf_doc: ReportTemplate,
-    product_groups: Dict[str, List[Dict[str, Any]]],
+    product_groups: Tuple[str, List[ShipmentItem]],
+    fast: bool = False,
+    totals: Optional[Dict[str, float]] = None,
 ):
     frame_w = pdf_doc.frame.width
 
-    normal = pdf_doc.styles["Normal"].clone("tbl_normal")
-    normal.fontSize = 9
-    normal.leading = 11
-
-    header = pdf_doc.styles["Normal"].clone("tbl_header")
-    header.fontName = "Helvetica-Bold"
-    header.fontSize = 9
-    header.leading = 11
-
-    footer = pdf_doc.styles["Normal"].clone("tbl_footer")
-    footer.fontName = "Helvetica-Bold"
-    footer.fontSize = 9
-    footer.leading = 11
-
     col_fracs = [0.30, 0.20, 0.05, 0.10, 0.1, 0.15, 0.1]
     col_widths = [frame_w * f for f in col_fracs]
 
     data: List[List[Any]] = [[
-        Paragraph("Product", header),
-        Paragraph("AWB", header),
-        Paragraph("Box No", header),
-        Paragraph("Number of Pieces", header),
-        Paragraph("Net Weight", header),
-        Paragraph("Price Per Kg", header),
-        Paragraph("Price", header)
+        Paragraph("Product", TABLE_HEADER),
+        Paragraph("AWB", TABLE_HEADER),
+        Paragraph("Box No", TABLE_HEADER),
+        Paragraph("Number of Pieces", TABLE_HEADER),
+        Paragraph("Net Weight", TABLE_HEADER),
+        Paragraph("Price Per Kg", TABLE_HEADER),
+        Paragraph("Price", TABLE_HEADER)
     ]]
 
-    total_box_number = 0
-    total_price_per_kilo = 0.0
-    total_customer_weight = 0.0
-    total_price = 0.0
-         
     product, items = product_groups
+
+    if totals is None:
+        totals = item_totals(items)
     
     for index, item in enumerate(items):
         product_header = product if index == 0 else ""
 
-        net_weight = to_float(item.get("net_weight"))
-        price_per_kilo = to_float(item.get("todays_price_per_kilo"))
-        price = to_float(item.get("price"))
+        net_weight = to_float(item.net_weight)
+        price_per_kilo = to_float(item.todays_price_per_kilo)
+        price = to_float(item.price)
 
         data.append([
-            Paragraph(str(product_header or ""), normal),
-            Paragraph(str(item.get("awb") or ""), normal),
-            Paragraph(str(item.get("box_number") or ""), normal),
-            Paragraph(str(item.get("pieces_per_box") or ""), normal),
-            Paragraph(f"{net_weight:.2f}", normal),
-            Paragraph(f"£{price_per_kilo:.2f}", normal),
-            Paragraph(f"£{price:.2f}", normal),
+            Paragraph(str(product_header or ""), TABLE_NORMAL),
+            _cell(str(item.awb or ""), TABLE_NORMAL, fast),
+            _cell(str(item.box_number or ""), TABLE_NORMAL, fast),
+            _cell(str(item.pieces_per_box or ""), TABLE_NORMAL, fast),
+            _cell(f"{net_weight:.2f}", TABLE_NORMAL, fast),
+            _cell(f"£{price_per_kilo:.2f}", TABLE_NORMAL, fast),
+            _cell(f"£{price:.2f}", TABLE_NORMAL, fast),
         ])
-
-        total_box_number += 1
-        total_customer_weight += net_weight
-        total_price_per_kilo += price_per_kilo
-        total_price += price
         
     data.append([
-        Paragraph("Totals", footer),
-        Paragraph("", footer),
-        Paragraph(str(total_box_number), footer),
-        Paragraph("", footer),
-        Paragraph(f"{total_customer_weight:.2f}kg", footer),
-        Paragraph(f"£{total_price_per_kilo:.2f}", footer),
-        Paragraph(f"£{total_price:.2f}", footer)
+        _cell("Totals", TABLE_FOOTER, fast),
+        _cell("", TABLE_FOOTER, fast),
+        _cell(str(totals["boxes"]), TABLE_FOOTER, fast),
+        _cell("", TABLE_FOOTER, fast),
+        _cell(f"{totals['net_weight']:.2f}kg", TABLE_FOOTER, fast),
+        _cell(f"£{totals['price_per_kilo']:.2f}", TABLE_FOOTER, fast),
+        _cell(f"£{totals['price']:.2f}", TABLE_FOOTER, fast)
     ])
 
-    last_row = len(data) - 1
+    if fast:
+        _fit_fast_cells(data, col_widths)
 
     table = Table(
         data,
@@ -504,17 +447,6 @@ def build_customer_allocation_table(
         repeatRows=1,
     )
 
-    table.setStyle(TableStyle([
-        ("GRID", (0, 0), (-1, -1), 1, colors.transparent),
-        ("BACKGROUND", (0, 0), (-1, 0), colors.transparent),
-        ("VALIGN", (0, 0), (-1, -1), "TOP"),
-        ("LEFTPADDING", (0, 0), (-1, -1), 3),
-        ("RIGHTPADDING", (0, 0), (-1, -1), 3),
-        ("TOPPADDING", (0, 0), (-1, -1), 2),
-        ("BOTTOMPADDING", (0, 0), (-1, -1), 2),
-        ("BACKGROUND", (0, last_row), (-1, last_row), colors.whitesmoke),
-        ("LINEABOVE", (0, last_row), (-1, last_row), 1.0, colors.grey),
-        ("ALIGN", (3, 1), (4, -1), "RIGHT"),
-    ]))
+    table.setStyle(REPORT_TABLE_FAST_STYLE if fast else REPORT_TABLE_STYLE)
 
     return table
\ No newline at end of file
@@ -0,0 +1,127 @@
+import asyncio
+import os
+import time
+from typing import Dict, Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.helpers.metrics import ADMISSION_QUEUED, ADMISSION_REJECTIONS, ADMISSION_WAIT_SECONDS
+from app.helpers.responses import FastJSONResponse
+
+
+class AdmissionLimit:
+    # Concurrency limit for one endpoint class, with a short bounded queue in
+    # front of it. Requests beyond the queue, or that wait too long in it,
+    # are turned away instead of piling onto the threadpool and render pool.
+
+    def __init__(self, name: str, max_concurrent: int, max_queued: int, timeout_seconds: float):
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.timeout_seconds = timeout_seconds
+
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._waiting = 0
+        self._in_flight = 0
+        self._rejected = 0
+
+    async def acquire(self) -> Optional[str]:
+        # Returns the rejection reason, or None once a slot is held
+        if not self._slots.locked():
+            await self._slots.acquire()
+            self._in_flight += 1
+            ADMISSION_WAIT_SECONDS.labels(self.name).observe(0)
+            return None
+
+        if self._waiting >= self.max_queued:
+            return self._reject("queue_full")
+
+        self._waiting += 1
+        ADMISSION_QUEUED.labels(self.name).inc()
+        started = time.perf_counter()
+
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.timeout_seconds)
+        except asyncio.TimeoutError:
+            return self._reject("timeout")
+        finally:
+            self._waiting -= 1
+            ADMISSION_QUEUED.labels(self.name).dec()
+            ADMISSION_WAIT_SECONDS.labels(self.name).observe(time.perf_counter() - started)
+
+        self._in_flight += 1
+        return None
+
+    def release(self) -> None:
+        self._in_flight -= 1
+        self._slots.release()
+
+    def _reject(self, reason: str) -> str:
+        self._rejected += 1
+        ADMISSION_REJECTIONS.labels(self.name, reason).inc()
+        return reason
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queued": self.max_queued,
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "rejected": self._rejected,
+        }
+
+
+def admission_limits() -> Dict[str, AdmissionLimit]:
+    timeout_seconds = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", 5))
+
+    return {
+        "reports": AdmissionLimit(
+            "reports",
+            int(os.getenv("REPORT_MAX_CONCURRENT_REQUESTS", 16)),
+            int(os.getenv("REPORT_MAX_QUEUED_REQUESTS", 32)),
+            timeout_seconds,
+        ),
+        "scanner": AdmissionLimit(
+            "scanner",
+            int(os.getenv("SCANNER_MAX_CONCURRENT_REQUESTS", 4)),
+            int(os.getenv("SCANNER_MAX_QUEUED_REQUESTS", 8)),
+            timeout_seconds,
+        ),
+    }
+
+
+class AdmissionMiddleware:
+    # Applies the limit for the request's endpoint class, taken from the
+    # first path segment. Job status polls are cheap reads and skip it.
+
+    def __init__(self, app: ASGIApp, limits: Optional[Dict[str, AdmissionLimit]] = None):
+        self.app = app
+        self.limits = admission_limits() if limits is None else limits
+        self.retry_after = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", 2))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "GET":
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.limits.get(scope["path"].strip("/").split("/")[0])
+
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        reason = await limit.acquire()
+
+        if reason is not None:
+            response = FastJSONResponse(
+                status_code=429,
+                content={"detail": f"Too many {limit.name} requests in progress, retry shortly"},
+                headers={"Retry-After": str(self.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limit.release()
@@ -0,0 +1,20 @@
+from typing import Any, Callable
+
+import msgspec
+from fastapi import HTTPException, Request
+
+
+def typed_body(model: Any) -> Callable:
+    # Decodes the raw request body straight into compact structs, skipping
+    # the generic dict FastAPI would otherwise build and validate first
+    decoder = msgspec.json.Decoder(model)
+
+    async def decode(request: Request):
+        try:
+            return decoder.decode(await request.body())
+        except msgspec.ValidationError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        except msgspec.DecodeError as e:
+            raise HTTPException(status_code=400, detail=f"Malformed JSON body: {str(e)}")
+
+    return decode
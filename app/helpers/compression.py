@@ -0,0 +1,124 @@
+import gzip
+import os
+import time
+from typing import Optional
+
+import brotli
+from fastapi.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.helpers.metrics import RESPONSE_BYTES, RESPONSE_COMPRESSION_SECONDS
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "text/",
+)
+
+# Bodies above this size are compressed on a worker thread instead of the event loop
+THREADPOOL_SIZE = 1024 * 1024
+
+
+class CompressionMiddleware:
+    # Compresses complete (non-streaming) JSON and text responses with brotli
+    # or gzip, whichever the client prefers, once they pass minimum_size.
+    # Streaming responses and already encoded bodies pass through untouched.
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: Optional[int] = None,
+        gzip_level: int = 6,
+        brotli_quality: int = 5,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size or int(os.getenv("RESPONSE_COMPRESSION_MIN_SIZE", 1024))
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = _negotiate(Headers(scope=scope).get("accept-encoding", ""))
+        start_message: Optional[Message] = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start_message
+
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            headers = MutableHeaders(raw=start["headers"])
+            body = message.get("body", b"")
+
+            if message.get("more_body", False):
+                await send(start)
+                await send(message)
+                return
+
+            if (
+                encoding is None
+                or len(body) < self.minimum_size
+                or "content-encoding" in headers
+                or not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+            ):
+                RESPONSE_BYTES.labels("identity").observe(len(body))
+                await send(start)
+                await send(message)
+                return
+
+            started = time.perf_counter()
+
+            if len(body) >= THREADPOOL_SIZE:
+                body = await run_in_threadpool(self._compress, encoding, body)
+            else:
+                body = self._compress(encoding, body)
+
+            RESPONSE_COMPRESSION_SECONDS.labels(encoding).observe(time.perf_counter() - started)
+            RESPONSE_BYTES.labels(encoding).observe(len(body))
+
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
+
+    def _compress(self, encoding: str, body: bytes) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+
+def _negotiate(accept_encoding: str) -> Optional[str]:
+    accepted = {}
+
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+
+        if coding:
+            accepted[coding] = quality
+
+    for coding in ("br", "gzip"):
+        if accepted.get(coding, accepted.get("*", 0.0)) > 0:
+            return coding
+
+    return None
@@ -0,0 +1,130 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import Request
+
+from app.functions.render import ping_render_worker, warm_render_worker
+from app.helpers.metrics import RENDER_QUEUE_DEPTH, RENDER_QUEUE_SECONDS, RENDERS_IN_FLIGHT
+
+
+class RenderExecutor:
+    def __init__(self, max_workers: Optional[int] = None, max_concurrent_renders: Optional[int] = None):
+        self.max_workers = max_workers or int(os.getenv("REPORT_RENDER_WORKERS", os.cpu_count() or 1))
+        self.max_concurrent_renders = max_concurrent_renders or int(
+            os.getenv("REPORT_MAX_CONCURRENT_RENDERS", self.max_workers)
+        )
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._render_slots = asyncio.Semaphore(self.max_concurrent_renders)
+        self._restart_lock = asyncio.Lock()
+        self._in_flight = 0
+        self._waiting = 0
+        self._completed = 0
+        self._restarts = 0
+
+    def start(self) -> None:
+        if self._pool is not None:
+            return
+
+        self._pool = self._new_pool()
+
+    def _new_pool(self, max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+        # spawn rather than fork: the parent already has the event loop and uvicorn threads running
+        return ProcessPoolExecutor(
+            max_workers=max_workers or self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=warm_render_worker,
+        )
+
+    async def warm(self) -> None:
+        # Bypasses the render slots so every worker process is spawned and warmed up front
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(
+            loop.run_in_executor(self._pool, ping_render_worker)
+            for _ in range(self.max_workers)
+        ))
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if self._pool is None:
+            raise RuntimeError("Render executor has not been started")
+
+        loop = asyncio.get_running_loop()
+
+        self._waiting += 1
+        RENDER_QUEUE_DEPTH.inc()
+        started = time.perf_counter()
+
+        try:
+            await self._render_slots.acquire()
+        finally:
+            self._waiting -= 1
+            RENDER_QUEUE_DEPTH.dec()
+
+        RENDER_QUEUE_SECONDS.observe(time.perf_counter() - started)
+        self._in_flight += 1
+        RENDERS_IN_FLIGHT.inc()
+
+        try:
+            return await self._submit(loop, fn, *args)
+        finally:
+            self._in_flight -= 1
+            self._completed += 1
+            RENDERS_IN_FLIGHT.dec()
+            self._render_slots.release()
+
+    async def _submit(self, loop: asyncio.AbstractEventLoop, fn: Callable[..., Any], *args: Any) -> Any:
+        # A worker dying (OOM on a huge document, a segfault) breaks the whole
+        # pool and fails everything in flight on it. The pool is replaced, and
+        # each of those renders is retried once in a process of its own, so
+        # the one that caused it fails without taking the others down again.
+        pool = self._pool
+
+        try:
+            return await loop.run_in_executor(pool, fn, *args)
+        except BrokenProcessPool:
+            await self._restart(pool)
+
+        isolated = self._new_pool(max_workers=1)
+
+        try:
+            return await loop.run_in_executor(isolated, fn, *args)
+        finally:
+            isolated.shutdown(wait=False)
+
+    async def _restart(self, broken: ProcessPoolExecutor) -> None:
+        async with self._restart_lock:
+            # Every render that was in flight sees the same broken pool;
+            # only the first one through replaces it
+            if self._pool is not broken:
+                return
+
+            print("Render pool broke, starting a new one")
+            broken.shutdown(wait=False, cancel_futures=True)
+            self._pool = self._new_pool()
+            self._restarts += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "started": self._pool is not None,
+            "workers": self.max_workers,
+            "max_concurrent_renders": self.max_concurrent_renders,
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "completed": self._completed,
+            "restarts": self._restarts,
+        }
+
+    def shutdown(self) -> None:
+        if self._pool is None:
+            return
+
+        self._pool.shutdown(wait=True, cancel_futures=True)
+        self._pool = None
+
+
+def get_render_executor(request: Request) -> RenderExecutor:
+    return request.app.state.render_executor
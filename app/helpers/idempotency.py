@@ -0,0 +1,156 @@
+import asyncio
+import json
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from fastapi import HTTPException, Request
+
+from app.helpers.sqlite import SQLiteConnection
+
+
+class IdempotencyStore:
+    # Results of requests sent with an Idempotency-Key, kept for ttl_seconds.
+    # A repeat gets the stored result; a repeat that arrives while the first
+    # request is still running waits for it instead of doing the work again.
+
+    def __init__(self, path: Optional[str] = None, ttl_seconds: Optional[int] = None):
+        self.path = path or os.getenv("REPORT_STATE_DB", "/tmp/fresco-reports.sqlite3")
+        self.ttl_seconds = ttl_seconds or int(os.getenv("IDEMPOTENCY_TTL_SECONDS", 24 * 3600))
+
+        self._db = SQLiteConnection(self.path)
+        self._connection = self._db.connection
+        self._db.run_sync(self._create_tables)
+
+        self._pending: Dict[Tuple[str, str], Tuple[str, asyncio.Future]] = {}
+        self._replayed = 0
+        self._joined = 0
+        self._stored = 0
+
+    def _create_tables(self) -> None:
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS idempotency_keys (
+                scope TEXT NOT NULL,
+                key TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                status_code INTEGER NOT NULL,
+                content TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (scope, key)
+            )
+            """
+        )
+        self._connection.commit()
+
+    async def run(
+        self,
+        scope: str,
+        key: str,
+        fingerprint: str,
+        produce: Callable[[], Awaitable[Tuple[int, Any]]],
+    ) -> Tuple[int, Any, bool]:
+        # Returns (status_code, content, replayed)
+        while True:
+            stored = await self._db.run(self._get, scope, key)
+
+            if stored is not None:
+                self._check(fingerprint, stored[0])
+                self._replayed += 1
+                return stored[1], stored[2], True
+
+            pending = self._pending.get((scope, key))
+
+            if pending is None:
+                break
+
+            self._check(fingerprint, pending[0])
+
+            try:
+                status_code, content = await asyncio.shield(pending[1])
+            except asyncio.CancelledError:
+                # The first request went away before finishing; unless this
+                # one is being cancelled too, take the work over
+                if pending[1].cancelled():
+                    continue
+
+                raise
+
+            self._joined += 1
+            return status_code, content, True
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[(scope, key)] = (fingerprint, future)
+
+        try:
+            status_code, content = await produce()
+
+            # Stored before the key stops being pending, so a repeat can't
+            # slip in between and run the work again
+            await self._db.run(self._put, scope, key, fingerprint, status_code, content)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            # Failures aren't stored, so a later retry runs again; requests
+            # already waiting on this one get the same error
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            self._pending.pop((scope, key), None)
+
+        future.set_result((status_code, content))
+
+        return status_code, content, False
+
+    def _check(self, fingerprint: str, expected: str) -> None:
+        if fingerprint != expected:
+            raise HTTPException(
+                status_code=422,
+                detail="Idempotency-Key was already used for a different request",
+            )
+
+    def _get(self, scope: str, key: str) -> Optional[Tuple[str, int, Any]]:
+        row = self._connection.execute(
+            """
+            SELECT fingerprint, status_code, content FROM idempotency_keys
+            WHERE scope = ? AND key = ? AND created_at >= ?
+            """,
+            (scope, key, time.time() - self.ttl_seconds),
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        return row[0], row[1], json.loads(row[2])
+
+    def _put(self, scope: str, key: str, fingerprint: str, status_code: int, content: Any) -> None:
+        now = time.time()
+
+        self._connection.execute("DELETE FROM idempotency_keys WHERE created_at < ?", (now - self.ttl_seconds,))
+        self._connection.execute(
+            """
+            INSERT OR REPLACE INTO idempotency_keys (scope, key, fingerprint, status_code, content, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (scope, key, fingerprint, status_code, json.dumps(content), now),
+        )
+        self._connection.commit()
+        self._stored += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ttl_seconds": self.ttl_seconds,
+            "pending": len(self._pending),
+            "stored": self._stored,
+            "replayed": self._replayed,
+            "joined": self._joined,
+        }
+
+    def close(self) -> None:
+        self._db.close()
+
+
+def get_idempotency_store(request: Request) -> IdempotencyStore:
+    return request.app.state.idempotency_store
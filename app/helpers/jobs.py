@@ -0,0 +1,294 @@
+import asyncio
+import json
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional
+from uuid import uuid4
+
+import msgspec
+
+from fastapi import Request
+
+from app.helpers.metrics import REPORT_JOBS, record_failure
+from app.helpers.sqlite import SQLiteConnection
+
+JOB_STATUSES = ("queued", "running", "completed", "failed")
+
+
+class ReportJobQueue:
+    def __init__(
+        self,
+        service_factory: Callable[[], Any],
+        path: Optional[str] = None,
+        workers: Optional[int] = None,
+        retention_seconds: Optional[int] = None,
+    ):
+        self.service_factory = service_factory
+        self.path = path or os.getenv("REPORT_STATE_DB", "/tmp/fresco-reports.sqlite3")
+        self.workers = workers or int(os.getenv("REPORT_JOB_WORKERS", 2))
+        self.retention_seconds = retention_seconds or int(os.getenv("REPORT_JOB_RETENTION_SECONDS", 7 * 24 * 3600))
+        self.error_backoff_seconds = float(os.getenv("REPORT_JOB_ERROR_BACKOFF_SECONDS", 1))
+
+        self._db = SQLiteConnection(self.path)
+        self._connection = self._db.connection
+        self._db.run_sync(self._create_tables)
+
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        # Job counts by status for the gauges, kept up to date by this
+        # process's own transitions and re-read from the database by stats()
+        # so scrapes never query
+        self._counts: Dict[str, int] = {status: 0 for status in JOB_STATUSES}
+
+    def _create_tables(self) -> None:
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS report_jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                payload TEXT,
+                status TEXT NOT NULL,
+                completed INTEGER NOT NULL DEFAULT 0,
+                total INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+        self._connection.execute(
+            "CREATE INDEX IF NOT EXISTS report_jobs_status ON report_jobs (status, created_at)"
+        )
+        self._connection.commit()
+
+    async def start(self) -> None:
+        await self._db.run(self._recover)
+
+        for status in JOB_STATUSES:
+            REPORT_JOBS.labels(status).set_function(lambda status=status: max(self._counts[status], 0))
+
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+        self._wakeup.set()
+
+    def _recover(self) -> None:
+        now = time.time()
+
+        # Anything still marked running was interrupted by a restart
+        self._connection.execute(
+            "UPDATE report_jobs SET status = 'queued', completed = 0, updated_at = ? WHERE status = 'running'",
+            (now,),
+        )
+        self._connection.execute(
+            "DELETE FROM report_jobs WHERE status IN ('completed', 'failed') AND updated_at < ?",
+            (now - self.retention_seconds,),
+        )
+        self._connection.commit()
+        self._count()
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._db.close()
+
+    async def enqueue(
+        self,
+        kind: str,
+        body: Any,
+        options: Dict[str, Any],
+        include_body: bool = False,
+        total: Optional[int] = None,
+    ) -> str:
+        job_id = await self._db.run(self._insert, kind, body, options, include_body, total)
+        self._wakeup.set()
+
+        return job_id
+
+    def _insert(
+        self,
+        kind: str,
+        body: Any,
+        options: Dict[str, Any],
+        include_body: bool = False,
+        total: Optional[int] = None,
+    ) -> str:
+        job_id = uuid4().hex
+        now = time.time()
+
+        if total is None:
+            total = len(body) if isinstance(body, list) else 1
+
+        self._connection.execute(
+            """
+            INSERT INTO report_jobs (id, kind, payload, status, total, created_at, updated_at)
+            VALUES (?, ?, ?, 'queued', ?, ?, ?)
+            """,
+            (
+                job_id,
+                kind,
+                msgspec.json.encode({"body": body, "options": options, "include_body": include_body}).decode("utf-8"),
+                total,
+                now,
+                now,
+            ),
+        )
+        self._connection.commit()
+        self._counts["queued"] += 1
+
+        return job_id
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self._db.run(self._get, job_id)
+
+    def _get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        row = self._connection.execute(
+            """
+            SELECT id, kind, status, completed, total, result, error, created_at, updated_at
+            FROM report_jobs WHERE id = ?
+            """,
+            (job_id,),
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        job_id, kind, status, completed, total, result, error, created_at, updated_at = row
+
+        return {
+            "id": job_id,
+            "kind": kind,
+            "status": status,
+            "progress": {"completed": completed, "total": total},
+            "result": json.loads(result) if result else None,
+            "error": error,
+            "created_at": created_at,
+            "updated_at": updated_at,
+        }
+
+    async def stats(self) -> Dict[str, Any]:
+        counts = await self._db.run(self._count)
+
+        return {"workers": self.workers, **counts}
+
+    def _count(self) -> Dict[str, int]:
+        counts = dict(self._connection.execute(
+            "SELECT status, COUNT(*) FROM report_jobs GROUP BY status"
+        ).fetchall())
+
+        self._counts = {status: counts.get(status, 0) for status in JOB_STATUSES}
+        return dict(self._counts)
+
+    def _claim(self) -> Optional[Dict[str, Any]]:
+        while True:
+            row = self._connection.execute(
+                "SELECT id, kind, payload FROM report_jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            claimed = self._connection.execute(
+                "UPDATE report_jobs SET status = 'running', updated_at = ? WHERE id = ? AND status = 'queued'",
+                (time.time(), row[0]),
+            )
+            self._connection.commit()
+
+            # Another process sharing the database got there first
+            if claimed.rowcount == 1:
+                self._counts["queued"] -= 1
+                self._counts["running"] += 1
+                return {"id": row[0], "kind": row[1], **json.loads(row[2])}
+
+    def _advance(self, job_id: str) -> None:
+        self._connection.execute(
+            "UPDATE report_jobs SET completed = completed + 1, updated_at = ? WHERE id = ?",
+            (time.time(), job_id),
+        )
+        self._connection.commit()
+
+    def _finish(self, job_id: str, result: Any = None, error: Optional[str] = None) -> None:
+        status = "failed" if error is not None else "completed"
+
+        finished = self._connection.execute(
+            """
+            UPDATE report_jobs
+            SET status = ?, result = ?, error = ?, payload = NULL, updated_at = ?
+            WHERE id = ? AND status = 'running'
+            """,
+            (
+                status,
+                json.dumps(result) if result is not None else None,
+                error,
+                time.time(),
+                job_id,
+            ),
+        )
+        self._connection.commit()
+
+        if finished.rowcount == 1:
+            self._counts["running"] -= 1
+            self._counts[status] += 1
+
+    async def _work(self) -> None:
+        # A database error (e.g. "database is locked" while another
+        # connection writes) mustn't end the worker for good; the job it was
+        # on is marked failed and the loop carries on after a short pause
+        while True:
+            job = None
+
+            try:
+                job = await self._db.run(self._claim)
+
+                if job is None:
+                    await self._idle()
+                    continue
+
+                await self._process(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error: {str(e)}")
+                record_failure("report_job_worker", e)
+                await asyncio.sleep(self.error_backoff_seconds)
+
+                if job is not None:
+                    await self._abandon(job["id"], e)
+
+    async def _idle(self) -> None:
+        self._wakeup.clear()
+
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=5)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _process(self, job: Dict[str, Any]) -> None:
+        job_id = job["id"]
+        service = self.service_factory()
+        service.on_document_published = lambda entry, job_id=job_id: self._db.run(self._advance, job_id)
+
+        try:
+            result = await service.run(job["kind"], job["body"], job["options"], job["include_body"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            detail = getattr(e, "detail", None) or str(e)
+            print(f"Report job {job_id} failed: {detail}")
+            record_failure(f"report_job_{job['kind']}", e)
+            await self._db.run(self._finish, job_id, None, detail)
+            return
+
+        await self._db.run(self._finish, job_id, result)
+
+    async def _abandon(self, job_id: str, error: Exception) -> None:
+        # Otherwise the claimed job would stay "running" until the next restart
+        try:
+            await self._db.run(self._finish, job_id, None, f"Report job could not be completed: {str(error)}")
+        except Exception as e:
+            print(f"Error: {str(e)}")
+
+def get_report_jobs(request: Request) -> ReportJobQueue:
+    return request.app.state.report_jobs
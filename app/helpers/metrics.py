@@ -0,0 +1,201 @@
+import time
+from contextvars import ContextVar
+from typing import Dict
+
+from prometheus_client import Counter, Gauge, Histogram
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+BYTE_BUCKETS = (
+    256, 1024, 4 * 1024, 16 * 1024, 64 * 1024, 256 * 1024,
+    1024 * 1024, 4 * 1024 * 1024, 16 * 1024 * 1024, 64 * 1024 * 1024,
+)
+FAST_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+STAGE_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+# Set per request by MetricsMiddleware, e.g. "reports/release-forms" or "scanner/template_one"
+ENDPOINT: ContextVar[str] = ContextVar("endpoint", default="other")
+
+# Responses
+RESPONSE_ENCODE_SECONDS = Histogram(
+    "fresco_response_encode_seconds",
+    "Time spent serialising JSON response bodies",
+    ["endpoint"],
+    buckets=FAST_BUCKETS,
+)
+RESPONSE_BYTES = Histogram(
+    "fresco_response_bytes",
+    "Response body size as sent, by content encoding",
+    ["encoding"],
+    buckets=BYTE_BUCKETS,
+)
+RESPONSE_COMPRESSION_SECONDS = Histogram(
+    "fresco_response_compression_seconds",
+    "Time spent compressing response bodies, by content encoding",
+    ["encoding"],
+    buckets=FAST_BUCKETS,
+)
+REQUEST_SECONDS = Histogram(
+    "fresco_request_seconds",
+    "End-to-end request time by endpoint",
+    ["endpoint"],
+    buckets=STAGE_BUCKETS,
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "fresco_requests_in_flight",
+    "Requests currently being handled, by endpoint",
+    ["endpoint"],
+)
+
+# Admission control
+ADMISSION_WAIT_SECONDS = Histogram(
+    "fresco_admission_wait_seconds",
+    "Time admitted or timed-out requests spent queued for a slot, by endpoint class",
+    ["endpoint_class"],
+    buckets=FAST_BUCKETS + (5, 10, 30),
+)
+ADMISSION_QUEUED = Gauge(
+    "fresco_admission_queued",
+    "Requests waiting for a slot, by endpoint class",
+    ["endpoint_class"],
+)
+ADMISSION_REJECTIONS = Counter(
+    "fresco_admission_rejections_total",
+    "Requests rejected with 429, by endpoint class and reason",
+    ["endpoint_class", "reason"],
+)
+
+# Reports
+REPORT_STAGE_SECONDS = Histogram(
+    "fresco_report_stage_seconds",
+    "Time per report generation stage (grouping, layout, pdf_build, export, upload)",
+    ["report", "stage"],
+    buckets=STAGE_BUCKETS,
+)
+REPORT_ROWS = Counter(
+    "fresco_report_rows_total",
+    "Shipment item rows rendered into reports",
+    ["report"],
+)
+REPORT_PAGES = Counter(
+    "fresco_report_pages_total",
+    "PDF pages produced",
+    ["report"],
+)
+REPORT_BYTES = Histogram(
+    "fresco_report_bytes",
+    "Size of rendered documents, by output format",
+    ["report", "format"],
+    buckets=BYTE_BUCKETS,
+)
+REPORT_PAGE_BYTES = Histogram(
+    "fresco_report_page_bytes",
+    "Average PDF size per page",
+    ["report"],
+    buckets=BYTE_BUCKETS,
+)
+REPORT_DOCUMENTS = Counter(
+    "fresco_report_documents_total",
+    "Report documents published, by whether they came from the cache",
+    ["report", "cached"],
+)
+
+# Scanner
+SCAN_STAGE_SECONDS = Histogram(
+    "fresco_scan_stage_seconds",
+    "Time per scan stage (download, extraction, cleanup)",
+    ["template", "stage"],
+    buckets=STAGE_BUCKETS,
+)
+SCAN_ROWS = Counter(
+    "fresco_scan_rows_total",
+    "Rows extracted from scanned shipment files",
+    ["template"],
+)
+
+# Render pool
+RENDER_QUEUE_SECONDS = Histogram(
+    "fresco_render_queue_seconds",
+    "Time render jobs wait for a render slot",
+    buckets=STAGE_BUCKETS,
+)
+RENDERS_IN_FLIGHT = Gauge(
+    "fresco_renders_in_flight",
+    "Render jobs currently running in the process pool",
+)
+RENDER_QUEUE_DEPTH = Gauge(
+    "fresco_render_queue_depth",
+    "Render jobs waiting for a render slot",
+)
+
+# Storage
+UPLOADED_BYTES = Counter(
+    "fresco_storage_uploaded_bytes_total",
+    "Bytes uploaded to storage",
+)
+UPLOAD_RETRIES = Counter(
+    "fresco_storage_upload_retries_total",
+    "Upload attempts retried after a transient failure",
+)
+UPLOADS_IN_FLIGHT = Gauge(
+    "fresco_storage_uploads_in_flight",
+    "Uploads currently in progress",
+)
+UPLOAD_QUEUE_DEPTH = Gauge(
+    "fresco_storage_upload_queue_depth",
+    "Uploads waiting for an upload slot",
+)
+
+# Background jobs
+REPORT_JOBS = Gauge(
+    "fresco_report_jobs",
+    "Report jobs in the persistent queue, by status",
+    ["status"],
+)
+
+FAILURES = Counter(
+    "fresco_failures_total",
+    "Failures by operation and reason",
+    ["operation", "reason"],
+)
+
+
+def endpoint_label(path: str) -> str:
+    parts = path.strip("/").split("/")
+
+    if len(parts) >= 2 and parts[0] in ("reports", "scanner"):
+        return f"{parts[0]}/{parts[1]}"
+
+    return "other"
+
+
+def record_failure(operation: str, error: BaseException) -> None:
+    reason = getattr(error, "status_code", None) or type(error).__name__
+    FAILURES.labels(operation, str(reason)).inc()
+
+
+def observe_stages(report: str, timings: Dict[str, float]) -> None:
+    for stage, seconds in timings.items():
+        REPORT_STAGE_SECONDS.labels(report, stage).observe(seconds)
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        endpoint = endpoint_label(scope["path"])
+        token = ENDPOINT.set(endpoint)
+        started = time.perf_counter()
+
+        REQUESTS_IN_FLIGHT.labels(endpoint).inc()
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            REQUESTS_IN_FLIGHT.labels(endpoint).dec()
+            REQUEST_SECONDS.labels(endpoint).observe(time.perf_counter() - started)
+            ENDPOINT.reset(token)
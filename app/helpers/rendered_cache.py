@@ -0,0 +1,124 @@
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import Request
+
+from app.classes.spool import SpooledDocument
+
+
+class RenderedCache:
+    # Rendered documents that haven't been stored yet, keyed by digest. A
+    # document stays here from render until its upload succeeds, so a retry
+    # after a failed upload goes straight back to the upload step.
+    #
+    # Nothing is evicted to make room: a request can hold renders for 100
+    # companies and every one of them must survive a failed upload. Past
+    # max_memory_bytes the oldest in-memory documents are spilled to disk
+    # instead, and only expired entries that no upload is using are dropped.
+
+    def __init__(self, ttl_seconds: Optional[int] = None, max_memory_bytes: Optional[int] = None):
+        self.ttl_seconds = ttl_seconds or int(os.getenv("REPORT_RENDERED_CACHE_SECONDS", 600))
+        self.max_memory_bytes = max_memory_bytes or int(os.getenv("REPORT_RENDERED_CACHE_MEMORY", 64 * 1024 * 1024))
+
+        self._entries: "OrderedDict[str, Tuple[float, SpooledDocument, int]]" = OrderedDict()
+        self._leases: Dict[str, int] = {}
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._spilled = 0
+
+    def get(self, digest: str) -> Optional[Tuple[SpooledDocument, int]]:
+        # A hit is leased to the caller until release()
+        self._purge()
+        entry = self._entries.get(digest)
+
+        if entry is None:
+            self._misses += 1
+            return None
+
+        self._hits += 1
+        self._leases[digest] = self._leases.get(digest, 0) + 1
+        _, document, count = entry
+        return document, count
+
+    def put(self, digest: str, document: SpooledDocument, count: int) -> None:
+        # The new entry is leased to the caller until release()
+        previous = self._entries.pop(digest, None)
+
+        if previous is not None and previous[1] is not document:
+            previous[1].close()
+
+        self._entries[digest] = (time.monotonic() + self.ttl_seconds, document, count)
+        self._leases[digest] = self._leases.get(digest, 0) + 1
+
+        self._spill()
+        self._purge()
+
+    def release(self, digest: str, stored: bool = False) -> None:
+        leases = self._leases.get(digest, 0) - 1
+
+        if leases > 0:
+            self._leases[digest] = leases
+        else:
+            self._leases.pop(digest, None)
+
+        if stored:
+            entry = self._entries.pop(digest, None)
+
+            if entry is not None:
+                entry[1].close()
+
+    def _spill(self) -> None:
+        memory = self._memory_bytes()
+
+        for _, document, _ in self._entries.values():
+            if memory <= self.max_memory_bytes:
+                break
+
+            if document.path is None:
+                memory -= document.size
+                document.spill()
+                self._spilled += 1
+
+    def _memory_bytes(self) -> int:
+        return sum(document.size for _, document, _ in self._entries.values() if document.path is None)
+
+    def _purge(self) -> None:
+        now = time.monotonic()
+
+        for digest, (expires_at, document, _) in list(self._entries.items()):
+            if expires_at > now:
+                break
+
+            if digest in self._leases:
+                continue
+
+            del self._entries[digest]
+            document.close()
+            self._expired += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "uploading": len(self._leases),
+            "memory_bytes": self._memory_bytes(),
+            "bytes": sum(document.size for _, document, _ in self._entries.values()),
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self._hits,
+            "misses": self._misses,
+            "spilled": self._spilled,
+            "expired": self._expired,
+        }
+
+    def close(self) -> None:
+        for _, document, _ in self._entries.values():
+            document.close()
+
+        self._entries.clear()
+        self._leases.clear()
+
+
+def get_rendered_cache(request: Request) -> RenderedCache:
+    return request.app.state.rendered_cache
@@ -0,0 +1,120 @@
+import json
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import Request
+
+from app.helpers.sqlite import SQLiteConnection
+
+
+class ReportCache:
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("REPORT_STATE_DB", "/tmp/fresco-reports.sqlite3")
+        self._db = SQLiteConnection(self.path)
+        self._connection = self._db.connection
+        self._db.run_sync(self._create_tables)
+        self._hits = 0
+        self._misses = 0
+        self._unchanged = 0
+        self._changed = 0
+
+    def _create_tables(self) -> None:
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS documents (
+                digest TEXT PRIMARY KEY,
+                document TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        # Latest content fingerprint per company document, so regenerations
+        # can tell which documents actually changed since the last run
+        self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS document_versions (
+                scope TEXT NOT NULL,
+                identity TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                document TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (scope, identity)
+            )
+            """
+        )
+        self._connection.commit()
+
+    async def get(self, digest: str) -> Optional[Dict[str, Any]]:
+        return await self._db.run(self._get, digest)
+
+    def _get(self, digest: str) -> Optional[Dict[str, Any]]:
+        row = self._connection.execute(
+            "SELECT document FROM documents WHERE digest = ?",
+            (digest,),
+        ).fetchone()
+
+        if row is None:
+            self._misses += 1
+            return None
+
+        self._hits += 1
+        return json.loads(row[0])
+
+    async def put(self, digest: str, document: Dict[str, Any]) -> None:
+        await self._db.run(self._put, digest, document)
+
+    def _put(self, digest: str, document: Dict[str, Any]) -> None:
+        self._connection.execute(
+            "INSERT OR REPLACE INTO documents (digest, document, created_at) VALUES (?, ?, ?)",
+            (digest, json.dumps(document), time.time()),
+        )
+        self._connection.commit()
+
+    async def get_version(self, scope: str, identity: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        return await self._db.run(self._get_version, scope, identity)
+
+    def _get_version(self, scope: str, identity: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        row = self._connection.execute(
+            "SELECT fingerprint, document FROM document_versions WHERE scope = ? AND identity = ?",
+            (scope, identity),
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        return row[0], json.loads(row[1])
+
+    async def put_version(self, scope: str, identity: str, fingerprint: str, document: Dict[str, Any], changed: bool) -> None:
+        await self._db.run(self._put_version, scope, identity, fingerprint, document, changed)
+
+    def _put_version(self, scope: str, identity: str, fingerprint: str, document: Dict[str, Any], changed: bool) -> None:
+        if changed:
+            self._changed += 1
+        else:
+            self._unchanged += 1
+
+        self._connection.execute(
+            """
+            INSERT OR REPLACE INTO document_versions (scope, identity, fingerprint, document, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (scope, identity, fingerprint, json.dumps(document), time.time()),
+        )
+        self._connection.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "hits": self._hits,
+            "misses": self._misses,
+            "unchanged": self._unchanged,
+            "changed": self._changed,
+        }
+
+    def close(self) -> None:
+        self._db.close()
+
+
+def get_report_cache(request: Request) -> ReportCache:
+    return request.app.state.report_cache
@@ -0,0 +1,21 @@
+import time
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+
+from app.helpers.metrics import ENDPOINT, RESPONSE_ENCODE_SECONDS
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        started = time.perf_counter()
+
+        body = orjson.dumps(
+            content,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY,
+        )
+
+        RESPONSE_ENCODE_SECONDS.labels(ENDPOINT.get()).observe(time.perf_counter() - started)
+
+        return body
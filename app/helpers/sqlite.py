@@ -0,0 +1,33 @@
+import asyncio
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable
+
+
+class SQLiteConnection:
+    # A sqlite3 connection that lives on a thread of its own. Statements and
+    # commits are sent there one at a time, so a slow fsync never stalls the
+    # event loop and two requests never interleave inside a transaction.
+
+    def __init__(self, path: str):
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fresco-sqlite")
+        self.connection = self._executor.submit(self._connect).result()
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+
+        return connection
+
+    async def run(self, function: Callable[..., Any], *args) -> Any:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, partial(function, *args))
+
+    def run_sync(self, function: Callable[..., Any], *args) -> Any:
+        # For setup and shutdown, outside of request handling
+        return self._executor.submit(function, *args).result()
+
+    def close(self) -> None:
+        self.run_sync(self.connection.close)
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,186 @@
+import asyncio
+import os
+import random
+from typing import Any, AsyncIterator, BinaryIO, Dict, Optional, Union
+
+import httpx
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+
+from app.helpers.metrics import UPLOAD_QUEUE_DEPTH, UPLOAD_RETRIES, UPLOADED_BYTES, UPLOADS_IN_FLIGHT, record_failure
+
+UPLOAD_CHUNK_SIZE = 256 * 1024
+
+
+def _retryable(error: Exception) -> bool:
+    # Network failures, timeouts and server-side errors are worth another
+    # attempt; anything else (auth, bad path, payload too large) is not
+    if isinstance(error, httpx.TransportError):
+        return True
+
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code == 429 or error.response.status_code >= 500
+
+    return False
+
+
+async def _file_chunks(file: BinaryIO, chunk_size: int = UPLOAD_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    while chunk := await run_in_threadpool(file.read, chunk_size):
+        yield chunk
+
+
+class StorageUploader:
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        key: Optional[str] = None,
+        bucket: str = "generated-reports",
+        max_concurrent_uploads: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        backoff_seconds: Optional[float] = None,
+    ):
+        # Missing credentials only fail uploads, not the app starting up;
+        # the client is created on first use
+        self.url = url or os.environ.get("SUPABASE_URL")
+        self._key = key or os.environ.get("SUPABASE_SERVICE_ROLE_KEY")
+
+        self.bucket = bucket
+        self.max_concurrent_uploads = max_concurrent_uploads or int(os.getenv("STORAGE_MAX_CONCURRENT_UPLOADS", 8))
+        self.max_retries = int(os.getenv("STORAGE_UPLOAD_RETRIES", 3)) if max_retries is None else max_retries
+        self.backoff_seconds = float(os.getenv("STORAGE_UPLOAD_BACKOFF_SECONDS", 0.5)) if backoff_seconds is None else backoff_seconds
+
+        self._upload_slots = asyncio.Semaphore(self.max_concurrent_uploads)
+        self._in_flight = 0
+        self._waiting = 0
+        self._uploaded = 0
+        self._failed = 0
+        self._retried = 0
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def configured(self) -> bool:
+        return bool(self.url and self._key)
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if not self.configured:
+            raise ValueError("Missing SUPABASE_URL or SUPABASE_SERVICE_ROLE_KEY enviroment variables")
+
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=f"{self.url}/storage/v1",
+                headers={
+                    "Authorization": f"Bearer {self._key}",
+                    "apikey": self._key,
+                },
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrent_uploads,
+                    max_keepalive_connections=self.max_concurrent_uploads,
+                ),
+                timeout=httpx.Timeout(60.0, connect=10.0),
+            )
+
+        return self._client
+
+    async def upload(
+        self,
+        file_path: str,
+        data: Union[bytes, BinaryIO],
+        content_type: str = "application/pdf",
+        upsert: bool = False,
+    ) -> str:
+        client = self._get_client()
+
+        # File handles are streamed in chunks rather than read into memory
+        if isinstance(data, bytes):
+            start, size = None, len(data)
+        else:
+            start = data.tell()
+            size = data.seek(0, os.SEEK_END) - start
+
+        attempt = 0
+
+        while True:
+            if start is not None:
+                data.seek(start)
+
+            try:
+                res = await self._post(
+                    client,
+                    file_path,
+                    data if start is None else _file_chunks(data),
+                    size,
+                    content_type,
+                    upsert,
+                )
+                break
+            except Exception as e:
+                if attempt >= self.max_retries or not _retryable(e):
+                    self._failed += 1
+                    record_failure("storage_upload", e.response if isinstance(e, httpx.HTTPStatusError) else e)
+                    raise
+
+            # Full jitter, so uploads that failed together don't retry together
+            attempt += 1
+            self._retried += 1
+            UPLOAD_RETRIES.inc()
+            await asyncio.sleep(random.uniform(0, self.backoff_seconds * 2 ** (attempt - 1)))
+
+        self._uploaded += 1
+        UPLOADED_BYTES.inc(size)
+
+        return res.json()["Key"]
+
+    async def _post(self, client: httpx.AsyncClient, file_path: str, content: Any, size: int, content_type: str, upsert: bool) -> httpx.Response:
+        self._waiting += 1
+        UPLOAD_QUEUE_DEPTH.inc()
+
+        try:
+            await self._upload_slots.acquire()
+        finally:
+            self._waiting -= 1
+            UPLOAD_QUEUE_DEPTH.dec()
+
+        self._in_flight += 1
+        UPLOADS_IN_FLIGHT.inc()
+
+        try:
+            res = await client.post(
+                f"/object/{self.bucket}/{file_path}",
+                content=content,
+                headers={
+                    "content-type": content_type,
+                    "content-length": str(size),
+                    "x-upsert": "true" if upsert else "false",
+                },
+            )
+            res.raise_for_status()
+        finally:
+            self._in_flight -= 1
+            UPLOADS_IN_FLIGHT.dec()
+            self._upload_slots.release()
+
+        return res
+
+    def public_url(self, full_path: str) -> str:
+        return f"{self.url}/storage/v1/object/public/{full_path}"
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "bucket": self.bucket,
+            "configured": self.configured,
+            "max_concurrent_uploads": self.max_concurrent_uploads,
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "uploaded": self._uploaded,
+            "failed": self._failed,
+            "retried": self._retried,
+            "closed": self._client is None or self._client.is_closed,
+        }
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+
+
+def get_storage_uploader(request: Request) -> StorageUploader:
+    return request.app.state.storage_uploader
@@ -0,0 +1,56 @@
+from typing import Awaitable, Callable, Dict, Optional
+
+import anyio
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.types import Receive, Scope, Send
+
+from app.classes.spool import SpooledDocument
+
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class DocumentStreamingResponse(StreamingResponse):
+    # Runs finalize once the stream is over however it ended. Background
+    # tasks are skipped when the client disconnects mid-stream, which would
+    # leak the spilled temp file and drop the upload.
+
+    def __init__(self, *args, finalize: Optional[Callable[[], Awaitable[None]]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.finalize = finalize
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            if self.finalize is not None:
+                with anyio.CancelScope(shield=True):
+                    await self.finalize()
+
+
+async def document_chunks(document: SpooledDocument, chunk_size: int = STREAM_CHUNK_SIZE):
+    with document.open() as file:
+        while chunk := await run_in_threadpool(file.read, chunk_size):
+            yield chunk
+
+
+def stream_document(
+    document: SpooledDocument,
+    media_type: str,
+    filename: str,
+    headers: Optional[Dict[str, str]] = None,
+    finalize: Optional[Callable[[], Awaitable[None]]] = None,
+    disposition: str = "inline",
+) -> StreamingResponse:
+    # Reads from the spooled document as the client consumes it; finalize
+    # is expected to close the document afterwards
+    return DocumentStreamingResponse(
+        document_chunks(document),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'{disposition}; filename="{filename}"',
+            "Content-Length": str(document.size),
+            **(headers or {}),
+        },
+        finalize=finalize,
+    )
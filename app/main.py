@@ -1,3 +1,5 @@
+from contextlib import AsyncExitStack, asynccontextmanager
+
 from fastapi import FastAPI
 
 # Controllers
@@ -5,23 +7,90 @@ from app.controllers.main_controller import main_router
 from app.controllers.report_controller import report_router
 from app.controllers.scanner_controller import scanner_router
 
+# Helpers
+from app.helpers.admission import AdmissionMiddleware, admission_limits
+from app.helpers.compression import CompressionMiddleware
+from app.helpers.executor import RenderExecutor
+from app.helpers.idempotency import IdempotencyStore
+from app.helpers.jobs import ReportJobQueue
+from app.helpers.metrics import MetricsMiddleware
+from app.helpers.rendered_cache import RenderedCache
+from app.helpers.report_cache import ReportCache
+from app.helpers.responses import FastJSONResponse
+from app.helpers.storage import StorageUploader
+
+# Services
+from app.services.report_service import ReportService
+from app.services.scanner_service import ScannerService
+
 app = FastAPI()
 
+@asynccontextmanager
+async def lifespan(application: FastAPI):
+    # Every resource registers its cleanup as soon as it exists, so a failure
+    # partway through startup still shuts down whatever had already started
+    async with AsyncExitStack() as stack:
+        render_executor = RenderExecutor()
+        stack.callback(render_executor.shutdown)
+        render_executor.start()
+        await render_executor.warm()
+
+        storage_uploader = StorageUploader()
+        stack.push_async_callback(storage_uploader.close)
+        report_cache = ReportCache()
+        stack.callback(report_cache.close)
+        rendered_cache = RenderedCache()
+        stack.callback(rendered_cache.close)
+        idempotency_store = IdempotencyStore()
+        stack.callback(idempotency_store.close)
+        scanner_service = ScannerService()
+        stack.push_async_callback(scanner_service.close)
+
+        application.state.render_executor = render_executor
+        application.state.storage_uploader = storage_uploader
+        application.state.report_cache = report_cache
+        application.state.rendered_cache = rendered_cache
+        application.state.idempotency_store = idempotency_store
+        application.state.scanner_service = scanner_service
+
+        report_jobs = ReportJobQueue(
+            service_factory=lambda: ReportService(
+                render_executor=render_executor,
+                storage_uploader=storage_uploader,
+                report_cache=report_cache,
+                rendered_cache=rendered_cache,
+            )
+        )
+        stack.push_async_callback(report_jobs.stop)
+        await report_jobs.start()
+
+        application.state.report_jobs = report_jobs
+
+        yield
+
 def start_application() -> FastAPI:
     application = FastAPI(
         title="Fresco Microservice",
-        debug=False
+        debug=False,
+        lifespan=lifespan,
+        default_response_class=FastJSONResponse
     )
-    
+
+    application.state.admission_limits = admission_limits()
+
+    application.add_middleware(CompressionMiddleware)
+    application.add_middleware(AdmissionMiddleware, limits=application.state.admission_limits)
+    application.add_middleware(MetricsMiddleware)
+
     application.include_router(main_router)
     application.include_router(report_router)
     application.include_router(scanner_router)
-    
+
     return application
 
 if __name__ == "__main__":
     import uvicorn
-    
+
     uvicorn.run(
         "app.main:start_application",
         factory=True,
@@ -30,4 +99,4 @@ if __name__ == "__main__":
         log_level="debug",
         access_log=True,
         reload=False
-    )
\ No newline at end of file
+    )
@@ -0,0 +1,83 @@
+from typing import Dict, List, Optional, Union
+
+import msgspec
+
+Identifier = Union[int, str]
+Number = Union[int, float, str]
+
+
+class Model(msgspec.Struct, kw_only=True, omit_defaults=True, gc=False):
+    # Request payloads are trees without reference cycles, so the instances
+    # can stay out of the garbage collector; unknown fields are ignored
+    pass
+
+
+class Named(Model):
+    id: Optional[Identifier] = None
+    name: Optional[str] = None
+
+
+class Product(Model):
+    id: Optional[Identifier] = None
+    name: Optional[str] = None
+    description: Optional[str] = None
+
+
+class ShipmentItem(Model):
+    id: Optional[Identifier] = None
+    awb: Optional[str] = None
+    box_number: Optional[Identifier] = None
+    net_weight: Optional[Number] = None
+    weight: Optional[Number] = None
+    customer_weight: Optional[Number] = None
+    pieces_per_box: Optional[Number] = None
+    price: Optional[Number] = None
+    todays_price_per_kilo: Optional[Number] = None
+    currency: Optional[str] = None
+    rate: Optional[Number] = None
+    product: Optional[Product] = None
+    customer: Optional[Named] = None
+    transportCompany: Optional[Named] = None
+    transport_companies: Optional[Named] = None
+    transport_company: Optional[Named] = None
+
+
+class Shipment(Model):
+    # Dates are parsed while rendering, so a shipment without the ones its
+    # report needs is rejected with a 422 up front instead of failing
+    # halfway through a PDF
+    production_date: str
+    id: Optional[Identifier] = None
+    awb: Optional[str] = None
+    supplier: Optional[str] = None
+    country: Optional[str] = None
+    arrival_date: Optional[str] = None
+    expiry_date: Optional[str] = None
+    storage_companies: Optional[Named] = None
+    shipment_items: List[ShipmentItem] = []
+
+
+class AllocatedShipment(Shipment, kw_only=True):
+    # The shipment allocation summary prints all three dates
+    arrival_date: str
+    expiry_date: str
+
+
+class Company(Model):
+    id: Optional[Identifier] = None
+    name: Optional[str] = None
+    shipments: List[Shipment] = []
+
+
+class ReportBatch(Model):
+    kinds: List[str]
+    companies: List[Company] = []
+
+
+REPORT_REQUEST_TYPES: Dict[str, type] = {
+    "release_form": List[Company],
+    "shipment_allocation": AllocatedShipment,
+    "collection_form": List[Company],
+    "customer_allocation_form": List[Company],
+    "batch": ReportBatch,
+}
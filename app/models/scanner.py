@@ -0,0 +1,5 @@
+from app.models.report import Model
+
+
+class ScanRequest(Model):
+    scanned_shipment_url: str
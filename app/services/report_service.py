@@ -1,614 +1,552 @@
-from collections import defaultdict
-import os
+import asyncio
 import datetime
-
-from io import BytesIO
-
-from typing import Any, Dict, List
+import time
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
 from fastapi import Depends, HTTPException
-from supabase import Client
-from uuid import uuid4
-
-from reportlab.platypus import Paragraph, Spacer, Table, TableStyle, CondPageBreak
-from reportlab.lib import colors
+import msgspec
 
-from app.classes.report import ReportTemplate
-from app.functions.table import build_collection_table, build_customer_allocation_table, build_release_table, build_shipment_allocation_summary_grid, build_shipment_allocation_table
+from app.classes.spool import SpooledDocument
+from app.functions.export import EXPORT_FORMATS, export_document
+from app.functions.grouping import count_items, group_collection_items, group_customer_allocation_items, group_release_items, index_shipments
+from app.functions.render import render_collection_form, render_customer_allocation_form, render_release_form, render_shipment_allocation
 from app.helpers.db import get_db_connection
-from app.helpers.supabase import supabase_client
+from app.helpers.executor import RenderExecutor, get_render_executor
+from app.helpers.metrics import REPORT_BYTES, REPORT_DOCUMENTS, REPORT_PAGE_BYTES, REPORT_PAGES, REPORT_ROWS, REPORT_STAGE_SECONDS, observe_stages, record_failure
+from app.helpers.rendered_cache import RenderedCache, get_rendered_cache
+from app.helpers.report_cache import ReportCache, get_report_cache
+from app.helpers.storage import StorageUploader, get_storage_uploader
+from app.models.report import REPORT_REQUEST_TYPES, AllocatedShipment, Company, ReportBatch
+from app.utils import fingerprint
+
+REPORT_KINDS = (
+    "release_form",
+    "shipment_allocation",
+    "collection_form",
+    "customer_allocation_form",
+)
+
+# Kinds that are built per company from a list of companies with shipments
+BATCH_KINDS = (
+    "release_form",
+    "collection_form",
+    "customer_allocation_form",
+)
 
 class ReportService:
     def __init__(
         self,
-        supabase_client: Client = Depends(supabase_client),
+        render_executor: RenderExecutor = Depends(get_render_executor),
+        storage_uploader: StorageUploader = Depends(get_storage_uploader),
+        report_cache: ReportCache = Depends(get_report_cache),
+        rendered_cache: RenderedCache = Depends(get_rendered_cache),
     ):
-        self.supabase_client = supabase_client
-    
-    async def create_release_form(self, body: List[Dict[str, Any]]):
+        self.render_executor = render_executor
+        self.storage_uploader = storage_uploader
+        self.report_cache = report_cache
+        self.rendered_cache = rendered_cache
+        self.on_document_published: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None
+
+    async def run(self, kind: str, body: Any, options: Optional[Dict[str, Any]] = None, include_body: bool = False):
+        if kind != "batch" and kind not in REPORT_KINDS:
+            raise ValueError(f"Unknown report kind: {kind}")
+
+        # Queued jobs come back from storage as plain JSON
+        body = msgspec.convert(body, REPORT_REQUEST_TYPES[kind])
+
+        if kind == "batch":
+            return await self.create_batch(body, options=options, include_body=include_body)
+
+        create = getattr(self, f"create_{kind}")
+        return await create(body, options=options, include_body=include_body)
+
+    def _document_digest(self, folder: str, job: Dict[str, Any], entry: Dict[str, Any]) -> str:
+        # Rendering is deterministic, so the job itself addresses the document:
+        # the same input on the same generated_on date maps to the same object
+        job["invariant"] = True
+
+        if not job.get("generated_on"):
+            job["generated_on"] = datetime.date.today().isoformat()
+
+        return fingerprint({"folder": folder, "type": entry["type"], "job": job})
+
+    async def _publish_document(
+        self,
+        folder: str,
+        render: Callable[[Dict[str, Any]], Any],
+        job: Dict[str, Any],
+        entry: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        incremental = job.pop("incremental", False)
+        digest = self._document_digest(folder, job, entry)
+
+        identity = self._document_identity(entry)
+        content = fingerprint({
+            "folder": folder,
+            "type": entry["type"],
+            "job": {key: value for key, value in job.items() if key != "generated_on"},
+        })
+        version = await self.report_cache.get_version(folder, identity) if identity else None
+        changed = version is None or version[0] != content
+
+        # Regenerations keep the last published document of anything whose
+        # rows are unchanged, even if it was generated on an earlier day
+        if incremental and not changed:
+            await self.report_cache.put_version(folder, identity, content, version[1], changed=False)
+            entry.update(version[1], cached=True, changed=False)
+            REPORT_DOCUMENTS.labels(folder, "true").inc()
+            return await self._published(entry)
+
+        document = await self.report_cache.get(digest)
+
+        if document is not None:
+            entry.update(document, cached=True)
+            REPORT_DOCUMENTS.labels(folder, "true").inc()
+        else:
+            document = await self._render_document(folder, render, job, entry, digest)
+            REPORT_DOCUMENTS.labels(folder, "false").inc()
+
+        if identity:
+            await self.report_cache.put_version(folder, identity, content, document, changed=changed)
+
+        entry["changed"] = changed
+        return await self._published(entry)
+
+    async def _render_document(
+        self,
+        folder: str,
+        render: Callable[[Dict[str, Any]], Any],
+        job: Dict[str, Any],
+        entry: Dict[str, Any],
+        digest: str,
+    ) -> Dict[str, Any]:
+        # A document whose upload failed on an earlier attempt is still in
+        # the rendered cache, so the retry only repeats the upload
+        cached = self.rendered_cache.get(digest)
+
+        if cached is not None:
+            rendered, page_count = cached
+        else:
+            rendered, page_count, timings = await self.render_executor.run(render, job)
+            self._observe_render(folder, job, rendered, page_count, timings)
+            self.rendered_cache.put(digest, rendered, page_count)
+
+        stored = False
+
         try:
-            response = []
-
-            for company in body:
-                storage_company_id = company.get("id")
-                storage_company_name = company.get("name")
-
-                buf = BytesIO()
-                pdf = ReportTemplate(
-                    buf,
-                    header_text=f"{storage_company_name} - Release Form",
-                    orientation="portrait"
-                )
-
-                elements: List[Any] = []
-
-                groups = defaultdict(
-                    lambda: defaultdict(
-                        lambda: defaultdict(lambda: {"supplier": None, "items": []})
-                    )
-                )
-
-                for shipment in company["shipments"]:
-                    awb = shipment.get("awb")
-                    production_date = shipment.get("production_date")
-                    supplier = shipment.get("supplier")
-
-                    for item in shipment["shipment_items"]:
-                        customer = item.get("customer")
-                        customer_name = customer.get("name") if customer else "Unallocated"
-
-                        awb_group = groups[production_date][customer_name][awb]
-                        awb_group["supplier"] = supplier
-                        awb_group["items"].append(item)
-
-                production_style = pdf.styles["Normal"].clone("production_style")
-                production_style.fontName = "Helvetica-Bold"
-                production_style.fontSize = 11
-                production_style.leading = 13
-                production_style.leftIndent = 0
-                production_style.firstLineIndent = 0
-                production_style.spaceBefore = 0
-                production_style.spaceAfter = 6
-
-                dispatch_style = pdf.styles["Normal"].clone("dispatch_style")
-                dispatch_style.fontName = "Helvetica-Bold"
-                dispatch_style.fontSize = 8
-                dispatch_style.leftIndent = 0
-                dispatch_style.firstLineIndent = 0
-                dispatch_style.spaceBefore = 0
-                dispatch_style.spaceAfter = 8
-
-                customer_style = pdf.styles["Normal"].clone("customer_style")
-                customer_style.fontName = "Helvetica-Bold"
-                customer_style.fontSize = 10
-                customer_style.leftIndent = 0
-                customer_style.firstLineIndent = 0
-                customer_style.spaceBefore = 0
-                customer_style.spaceAfter = 6
-
-                summary_title_style = pdf.styles["Normal"].clone("summary_title_style")
-                summary_title_style.fontName = "Helvetica-Bold"
-                summary_title_style.fontSize = 11
-                summary_title_style.leading = 13
-                summary_title_style.spaceBefore = 8
-                summary_title_style.spaceAfter = 8
-
-                summary_text_style = pdf.styles["Normal"].clone("summary_text_style")
-                summary_text_style.fontName = "Helvetica"
-                summary_text_style.fontSize = 9
-                summary_text_style.leading = 11
-                summary_text_style.spaceBefore = 0
-                summary_text_style.spaceAfter = 4
-
-                summary = {
-                    "total_customers": set(),
-                    "total_awbs": set(),
-                    "total_boxes": 0,
-                    "total_weight": 0.0,
-                    "customers": defaultdict(lambda: {
-                        "awbs": set(),
-                        "boxes": 0,
-                        "weight": 0.0
-                    })
-                }
-
-                for production_date, customers in groups.items():
-                    formatted_date = datetime.datetime.fromisoformat(
-                        production_date.replace("Z", "+00:00")
-                    ).strftime("%d %b %Y")
-
-                    elements.append(
-                        Paragraph(f"For products dispatched on: {formatted_date}", dispatch_style)
-                    )
-                    elements.append(Spacer(1, 8))
-
-                    for customer_name, awb_groups in customers.items():
-                        elements.append(Paragraph(customer_name, customer_style))
-                        elements.append(Spacer(1, 6))
-
-                        # Update summary
-                        summary["total_customers"].add(customer_name)
-
-                        for awb, awb_data in awb_groups.items():
-                            summary["total_awbs"].add(awb)
-                            summary["customers"][customer_name]["awbs"].add(awb)
-
-                            for item in awb_data["items"]:
-                                weight = item.get("net_weight") or 0
-
-                                summary["total_boxes"] += 1
-                                summary["total_weight"] += weight
-                                summary["customers"][customer_name]["boxes"] += 1
-                                summary["customers"][customer_name]["weight"] += weight
-
-                        table = build_release_table(pdf, awb_groups)
-                        elements.append(table)
-                        elements.append(Spacer(1, 18))
-
-                    elements.append(Spacer(1, 8))
-
-                elements.append(CondPageBreak(120))
-                elements.append(Paragraph("Summary", summary_title_style))
-                elements.append(
-                    Paragraph(
-                        f"Total customers: {len(summary['total_customers'])}",
-                        summary_text_style
-                    )
-                )
-                elements.append(
-                    Paragraph(
-                        f"Total AWBs: {len(summary['total_awbs'])}",
-                        summary_text_style
-                    )
-                )
-                elements.append(
-                    Paragraph(
-                        f"Total boxes: {summary['total_boxes']}",
-                        summary_text_style
-                    )
-                )
-                elements.append(
-                    Paragraph(
-                        f"Total weight: {summary['total_weight']:.2f} kg",
-                        summary_text_style
-                    )
-                )
-
-                elements.append(Spacer(1, 12))
-                elements.append(Paragraph("Customer Breakdown", summary_title_style))
-                elements.append(Spacer(1, 6))
-
-                summary_data = [[
-                    Paragraph("Customer", customer_style),
-                    Paragraph("AWBs", customer_style),
-                    Paragraph("Boxes", customer_style),
-                    Paragraph("Weight (kg)", customer_style),
-                ]]
-
-                for customer_name, customer_summary in summary["customers"].items():
-                    summary_data.append([
-                        Paragraph(customer_name, summary_text_style),
-                        Paragraph(str(len(customer_summary["awbs"])), summary_text_style),
-                        Paragraph(str(customer_summary["boxes"]), summary_text_style),
-                        Paragraph(f"{customer_summary['weight']:.2f}", summary_text_style),
-                    ])
-
-                summary_table = Table(summary_data, colWidths=[180, 70, 70, 90])
-                summary_table.setStyle(TableStyle([
-                    ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#EAEAEA")),
-                    ("TEXTCOLOR", (0, 0), (-1, 0), colors.black),
-                    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                    ("FONTSIZE", (0, 0), (-1, -1), 9),
-                    ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-                    ("ALIGN", (1, 1), (-1, -1), "CENTER"),
-                    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                    ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
-                    ("TOPPADDING", (0, 0), (-1, 0), 6),
-                ]))
-                elements.append(summary_table)
-
-                pdf.build(elements)
-                pdf_bytes = buf.getvalue()
-                buf.close()
-
-                file_path = f"release-forms/{uuid4().hex}.pdf"
-
-                res = self.supabase_client.storage.from_("generated-reports").upload(
-                    file_path,
-                    pdf_bytes,
-                    {"content-type": "application/pdf"},
-                )
-
-                url = f"{os.getenv('SUPABASE_URL')}/storage/v1/object/public/{res.full_path}"
-
-                response.append({
-                    "type": "release_form",
-                    "storage_company_id": storage_company_id,
-                    "url": url,
-                    "body": body,
-                    "date_generated": datetime.datetime.now(datetime.timezone.utc).isoformat()
-                })
+            document = await self._store_document(folder, digest, entry, rendered, page_count)
+            stored = True
+        finally:
+            self.rendered_cache.release(digest, stored=stored)
+
+        return document
+
+    def _document_identity(self, entry: Dict[str, Any]) -> Optional[str]:
+        # The company (or shipment) a document belongs to; documents without
+        # an id can't be matched across requests
+        ids = {key: value for key, value in entry.items() if key.endswith("_id") and value is not None}
+
+        if not ids:
+            return None
+
+        return ",".join(f"{key}={value}" for key, value in sorted(ids.items()))
+
+    def _observe_render(
+        self,
+        folder: str,
+        job: Optional[Dict[str, Any]],
+        rendered: SpooledDocument,
+        count: int,
+        timings: Dict[str, float],
+        format: str = "pdf",
+    ) -> None:
+        # Exports cover several documents at once and count their rows themselves
+        observe_stages(folder, timings)
+        REPORT_ROWS.labels(folder).inc(self._row_count(job) if job is not None else count)
+        REPORT_BYTES.labels(folder, format).observe(rendered.size)
+
+        if format == "pdf":
+            REPORT_PAGES.labels(folder).inc(count)
+            REPORT_PAGE_BYTES.labels(folder).observe(rendered.size / max(count, 1))
+
+    def _row_count(self, job: Dict[str, Any]) -> int:
+        return count_items(job["shipment_items"] if "shipment_items" in job else job["groups"])
+
+    def _grouped(self, folder: str, group: Callable[..., Any], *args):
+        started = time.perf_counter()
+        groups = group(*args)
+        REPORT_STAGE_SECONDS.labels(folder, "grouping").observe(time.perf_counter() - started)
+
+        return groups
+
+    async def _store_document(
+        self,
+        folder: str,
+        digest: str,
+        entry: Dict[str, Any],
+        rendered: SpooledDocument,
+        count: int,
+        format: str = "pdf",
+    ) -> Dict[str, Any]:
+        content_type, _ = EXPORT_FORMATS[format]
+        started = time.perf_counter()
+
+        with rendered.open() as file:
+            full_path = await self.storage_uploader.upload(
+                f"{folder}/{digest}.{format}",
+                file,
+                content_type=content_type,
+                upsert=True,
+            )
+
+        REPORT_STAGE_SECONDS.labels(folder, "upload").observe(time.perf_counter() - started)
+
+        document = {
+            "id": digest,
+            "url": self.storage_uploader.public_url(full_path),
+            "checksum": rendered.checksum,
+            "etag": digest,
+            "page_count" if format == "pdf" else "row_count": count,
+            "date_generated": datetime.datetime.now(datetime.timezone.utc).isoformat()
+        }
+
+        await self.report_cache.put(digest, document)
+
+        entry.update(document, cached=False)
+        return document
+
+    async def _finish_preview(
+        self,
+        folder: str,
+        digest: str,
+        entry: Dict[str, Any],
+        rendered: SpooledDocument,
+        count: int,
+        format: str,
+        upload: bool,
+    ) -> None:
+        try:
+            if upload:
+                await self._store_document(folder, digest, entry, rendered, count, format=format)
+        except Exception as e:
+            print(f"Error uploading preview {folder}/{digest}.{format}: {str(e)}")
+        finally:
+            rendered.close()
+
+    async def preview_document(
+        self,
+        kind: str,
+        body: Any,
+        options: Optional[Dict[str, Any]] = None,
+        index: Optional[int] = None,
+        upload: bool = False,
+        format: str = "pdf",
+    ) -> Tuple[SpooledDocument, Dict[str, Any], Callable[[], Awaitable[None]]]:
+        # A PDF is the one document at index; CSV and XLSX hold every document
+        # of the request in a single file
+        if format == "pdf":
+            folder, render, job, entry = self._document(kind, body, options or {}, index or 0)
+            job.pop("incremental", None)
+            digest = self._document_digest(folder, job, entry)
+            run = partial(self.render_executor.run, render, job)
+        else:
+            folder, documents = self._export_documents(kind, body, options or {})
+            job = None
+            digest = fingerprint({
+                "folder": folder,
+                "format": format,
+                "documents": [self._document_digest(folder, job, entry) for _, job, entry in documents],
+            })
+            entry = {"type": kind, "documents": len(documents)}
+            run = partial(
+                self.render_executor.run,
+                export_document,
+                kind,
+                format,
+                [(title, job) for title, job, _ in documents],
+                kind != "shipment_allocation",
+            )
+
+        try:
+            rendered, count, timings = await run()
+        except Exception as e:
+            print(f"Error: {str(e)}")
+            record_failure(f"report_{kind}", e)
+            raise HTTPException(status_code=500, detail=str(e))
+
+        self._observe_render(folder, job, rendered, count, timings, format=format)
+
+        entry.update({"id": digest, "etag": digest, "page_count" if format == "pdf" else "row_count": count})
+
+        # The caller streams the document straight away and awaits finalize
+        # once the stream is over, complete or not: storing it is optional,
+        # and either way the spooled file is released afterwards
+        upload = upload and await self.report_cache.get(digest) is None
+        finalize = partial(self._finish_preview, folder, digest, entry, rendered, count, format, upload)
+
+        return rendered, entry, finalize
+
+    def _export_documents(self, kind: str, body: Any, options: Dict[str, Any]) -> Tuple[str, List[Tuple[str, Dict[str, Any], Dict[str, Any]]]]:
+        if kind not in REPORT_KINDS:
+            raise HTTPException(status_code=400, detail=f"Unknown report kind: {kind}")
+
+        if kind == "shipment_allocation":
+            folder, _, job, entry = self._shipment_allocation_document(body, options)
+            documents = [(kind, job, entry)]
+        else:
+            documents = []
+
+            for index, company in enumerate(body):
+                folder, _, job, entry = getattr(self, f"_{kind}_document")(company, index, options)
+                documents.append((company.name or str(company.id), job, entry))
+
+            if not documents:
+                raise HTTPException(status_code=404, detail="No documents to export")
+
+        for _, job, _ in documents:
+            job.pop("incremental", None)
+
+        return folder, documents
+
+    def _document(self, kind: str, body: Any, options: Dict[str, Any], index: int):
+        if kind not in REPORT_KINDS:
+            raise HTTPException(status_code=400, detail=f"Unknown report kind: {kind}")
+
+        if kind == "shipment_allocation":
+            return self._shipment_allocation_document(body, options)
+
+        if not isinstance(body, list) or not 0 <= index < len(body):
+            raise HTTPException(status_code=404, detail=f"No document at index {index}")
+
+        return getattr(self, f"_{kind}_document")(body[index], index, options)
+
+    async def _publish_all(self, documents: Iterable[Awaitable[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        # Every document is seen through before the first failure is raised,
+        # so the ones that did get stored are cache hits when the request is
+        # retried and only the failed ones are redone
+        entries = await asyncio.gather(*documents, return_exceptions=True)
+
+        for entry in entries:
+            if isinstance(entry, BaseException):
+                raise entry
+
+        return entries
+
+    async def _published(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        if self.on_document_published is not None:
+            await self.on_document_published(entry)
+
+        return entry
+
+    async def create_release_form(self, body: List[Company], options: Optional[Dict[str, Any]] = None, include_body: bool = False):
+        try:
+            response = await self._publish_all((
+                self._create_release_form_document(company, index, options or {})
+                for index, company in enumerate(body)
+            ))
+
+            if include_body:
+                for entry in response:
+                    entry["body"] = msgspec.to_builtins(body)
 
             return response
 
         except Exception as e:
             print(f"Error: {str(e)}")
+            record_failure("report_release_form", e)
             raise HTTPException(status_code=500, detail=str(e))
-        
-    async def create_shipment_allocation(self, body: List[Dict[str, Any]]):
+
+    async def _create_release_form_document(self, company: Company, index: int, options: Dict[str, Any]):
+        return await self._publish_document(*self._release_form_document(company, index, options))
+
+    def _release_form_document(self, company: Company, index: int, options: Dict[str, Any], grouping: Optional[Dict[str, Any]] = None):
+        storage_company_name = company.name
+        groups = grouping["release"] if grouping else self._grouped("release-forms", group_release_items, company.shipments)
+
+        return (
+            "release-forms",
+            render_release_form,
+            {
+                "header_text": f"{storage_company_name} - Release Form",
+                "groups": groups,
+                **options,
+            },
+            {
+                "type": "release_form",
+                "storage_company_id": company.id,
+                "index": index,
+            },
+        )
+
+    async def create_shipment_allocation(self, body: AllocatedShipment, options: Optional[Dict[str, Any]] = None, include_body: bool = False):
         try:
-            awb = body.get("awb")
-            shipment_id = body.get("id")
-            shipment_items = body.get("shipment_items")
-            supplier = body.get('supplier')
-            arrival_date = body.get('arrival_date')
-            country = body.get('country')
-            production_date = body.get('production_date')
-            storage_name = (body.get("storage_companies") or {}).get("name", "")
-            expiry_date = body.get('expiry_date')
-
-            buf = BytesIO()
-            pdf = ReportTemplate(
-                buf,
-                header_text=f"Fresco Shipment - {awb}",
-                orientation="landscape"
-            )
-            
-            elements: List[Any] = []
-            
-            summary_table = build_shipment_allocation_summary_grid(pdf, shipment_id, supplier, arrival_date, awb, country, production_date, storage_name, expiry_date)
-            elements.append(summary_table)
-            
-            elements.append(Spacer(1, 16))
-            
-            table = build_shipment_allocation_table(pdf, shipment_items)
-            elements.append(table)
-            
-            pdf.build(elements)
-            pdf_bytes = buf.getvalue()
-            buf.close()
-
-            file_path = f"shipment-allocations/{uuid4().hex}.pdf"
-
-            res = self.supabase_client.storage.from_("generated-reports").upload(
-                file_path,
-                pdf_bytes,
-                {"content-type": "application/pdf"},
-            )
+            entry = await self._publish_document(*self._shipment_allocation_document(body, options or {}))
+
+            if include_body:
+                entry["body"] = msgspec.to_builtins(body)
+
+            return entry
+
+        except Exception as e:
+            print(f"Error: {str(e)}")
+            record_failure("report_shipment_allocation", e)
+            raise HTTPException(status_code=500, detail=str(e))
 
-            url = f"{os.getenv('SUPABASE_URL')}/storage/v1/object/public/{res.full_path}"
+    def _shipment_allocation_document(self, body: AllocatedShipment, options: Dict[str, Any]):
+        awb = body.awb
+        shipment_id = body.id
 
-            return {
+        return (
+            "shipment-allocations",
+            render_shipment_allocation,
+            {
+                "header_text": f"Fresco Shipment - {awb}",
+                "awb": awb,
+                "shipment_id": shipment_id,
+                "shipment_items": body.shipment_items,
+                "supplier": body.supplier,
+                "arrival_date": body.arrival_date,
+                "country": body.country,
+                "production_date": body.production_date,
+                "storage_name": body.storage_companies.name if body.storage_companies else "",
+                "expiry_date": body.expiry_date,
+                **options,
+            },
+            {
                 "type": "shipment_allocation",
                 "shipment_id": shipment_id,
-                "url": url,
-                "body": body,
-                "date_generated": datetime.datetime.now(datetime.timezone.utc).isoformat()
-            }
-                                        
+            },
+        )
+
+    async def create_collection_form(self, body: List[Company], options: Optional[Dict[str, Any]] = None, include_body: bool = False):
+        try:
+            response = await self._publish_all((
+                self._create_collection_form_document(company, index, options or {})
+                for index, company in enumerate(body)
+            ))
+
+            if include_body:
+                for entry in response:
+                    entry["body"] = msgspec.to_builtins(body)
+
+            return response
+
         except Exception as e:
             print(f"Error: {str(e)}")
+            record_failure("report_collection_form", e)
             raise HTTPException(status_code=500, detail=str(e))
-        
-    async def create_collection_form(self, body: List[Dict[str, Any]]):
+
+    async def _create_collection_form_document(self, company: Company, index: int, options: Dict[str, Any]):
+        return await self._publish_document(*self._collection_form_document(company, index, options))
+
+    def _collection_form_document(self, company: Company, index: int, options: Dict[str, Any], grouping: Optional[Dict[str, Any]] = None):
+        transport_company_name = company.name
+
+        if grouping:
+            groups, storage_company_name = grouping["collection"], grouping["storage_company_name"]
+        else:
+            groups, storage_company_name = self._grouped("collection-forms", group_collection_items, company.shipments)
+
+        return (
+            "collection-forms",
+            render_collection_form,
+            {
+                "header_text": f"{transport_company_name} - Collection/Delivery Form",
+                "groups": groups,
+                "storage_company_name": storage_company_name,
+                **options,
+            },
+            {
+                "type": "collection_form",
+                "transport_company_id": company.id,
+                "index": index,
+            },
+        )
+
+    async def create_customer_allocation_form(self, body: List[Company], options: Optional[Dict[str, Any]] = None, include_body: bool = False):
         try:
-            response = []
-
-            for company in body:
-                transport_company_id = company.get("id")
-                transport_company_name = company.get("name")
-
-                buf = BytesIO()
-                pdf = ReportTemplate(
-                    buf,
-                    header_text=f"{transport_company_name} - Collection/Delivery Form",
-                    orientation="portrait"
-                )
-
-                elements: List[Any] = []
-
-                groups = defaultdict(
-                    lambda: defaultdict(
-                        lambda: defaultdict(list)
-                    )
-                )
-
-                for shipment in company["shipments"]:
-                    awb = shipment.get("awb")
-                    production_date = shipment.get("production_date")
-                    storage_company_name = shipment.get('storage_companies').get('name')
-
-                    for item in shipment["shipment_items"]:
-                        customer = item.get("customer")
-
-                        if customer:
-                            customer_name = customer.get("name")
-                            groups[production_date][customer_name][awb].append(item)
-
-                production_style = pdf.styles["Normal"].clone("production_style")
-                production_style.fontName = "Helvetica-Bold"
-                production_style.fontSize = 11
-                production_style.leading = 13
-                production_style.leftIndent = 0
-                production_style.firstLineIndent = 0
-                production_style.spaceBefore = 0
-                production_style.spaceAfter = 6
-                
-                dispatch_style = pdf.styles["Normal"].clone("dispatch_style")
-                dispatch_style.fontName = "Helvetica-Bold"
-                dispatch_style.fontSize = 8
-                dispatch_style.leftIndent = 0
-                dispatch_style.firstLineIndent = 0
-                dispatch_style.spaceBefore = 0
-                dispatch_style.spaceAfter = 8
-
-                customer_style = pdf.styles["Normal"].clone("customer_style")
-                customer_style.fontName = "Helvetica-Bold"
-                customer_style.fontSize = 10
-                customer_style.leftIndent = 0
-                customer_style.firstLineIndent = 0
-                customer_style.spaceBefore = 0
-                customer_style.spaceAfter = 6
-                
-                for production_date, customers in groups.items():
-                    formated_date = datetime.datetime.fromisoformat(
-                                        production_date.replace("Z", "+00:00")
-                                    ).strftime("%d %b %Y")
-                    
-                    elements.append(
-                        Paragraph(f"For products dispatched on: {formated_date}", dispatch_style)
-                    )
-                    elements.append(Spacer(1, 8))
-
-                    for customer_name, awb_groups in customers.items():
-                        elements.append(Paragraph(customer_name, customer_style))
-                        elements.append(Spacer(1, 6))
-
-                        table = build_collection_table(pdf, storage_company_name, awb_groups)
-                        elements.append(table)
-                        elements.append(Spacer(1, 18))
-
-                    elements.append(Spacer(1, 8))
-
-                pdf.build(elements)
-                pdf_bytes = buf.getvalue()
-                buf.close()
-
-                file_path = f"collection-forms/{uuid4().hex}.pdf"
-
-                res = self.supabase_client.storage.from_("generated-reports").upload(
-                    file_path,
-                    pdf_bytes,
-                    {"content-type": "application/pdf"},
-                )
-
-                url = f"{os.getenv('SUPABASE_URL')}/storage/v1/object/public/{res.full_path}"
-
-                response.append({
-                    "type": "release_form",
-                    "transport_company_id": transport_company_id,
-                    "url": url,
-                    "body": body,
-                    "date_generated": datetime.datetime.now(datetime.timezone.utc).isoformat()
-                })
-                
+            response = await self._publish_all((
+                self._create_customer_allocation_form_document(customer, index, options or {})
+                for index, customer in enumerate(body)
+            ))
+
+            if include_body:
+                for entry in response:
+                    entry["body"] = msgspec.to_builtins(body)
+
             return response
 
         except Exception as e:
             print(f"Error: {str(e)}")
+            record_failure("report_customer_allocation_form", e)
             raise HTTPException(status_code=500, detail=str(e))
-        
-    async def create_customer_allocation_form(self, body: List[Dict[str, Any]]):
+
+    async def _create_customer_allocation_form_document(self, customer: Company, index: int, options: Dict[str, Any]):
+        return await self._publish_document(*self._customer_allocation_form_document(customer, index, options))
+
+    def _customer_allocation_form_document(self, customer: Company, index: int, options: Dict[str, Any], grouping: Optional[Dict[str, Any]] = None):
+        customer_name = customer.name
+
+        if grouping:
+            groups, awbs = grouping["customer_allocation"], grouping["awbs"]
+        else:
+            groups, awbs = self._grouped("customer-allocation-forms", group_customer_allocation_items, customer.shipments)
+
+        return (
+            "customer-allocation-forms",
+            render_customer_allocation_form,
+            {
+                "header_text": f"{customer_name} - Customer Sales Order",
+                "groups": groups,
+                "awbs": awbs,
+                **options,
+            },
+            {
+                "type": "customer_allocation_form",
+                "customer_id": customer.id,
+                "index": index,
+            },
+        )
+
+    async def create_batch(self, body: ReportBatch, options: Optional[Dict[str, Any]] = None, include_body: bool = False):
+        kinds = body.kinds
+        companies = body.companies
+
+        unknown = [kind for kind in kinds if kind not in BATCH_KINDS]
+
+        if not kinds or unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"kinds must be a non-empty list of {', '.join(BATCH_KINDS)}",
+            )
+
         try:
-            response = []
-
-            for customer in body:
-                customer_id = customer.get("id")
-                customer_name = customer.get("name")
-
-                buf = BytesIO()
-                pdf = ReportTemplate(
-                    buf,
-                    header_text=f"{customer_name} - Customer Sales Order",
-                    orientation="portrait"
-                )
-
-                elements: List[Any] = []
-
-                groups = defaultdict(lambda: defaultdict(list))
-
-                summary = {
-                    "total_awbs": set(),
-                    "total_products": set(),
-                    "total_boxes": 0,
-                    "total_weight": 0.0,
-                    "products": defaultdict(lambda: {
-                        "boxes": 0,
-                        "weight": 0.0
-                    })
-                }
-
-                for shipment in customer.get("shipments", []):
-                    production_date = shipment.get("production_date")
-                    awb = shipment.get("awb")
-
-                    if awb:
-                        summary["total_awbs"].add(awb)
-
-                    for item in shipment.get("shipment_items", []):
-                        product = item.get("product")
-                        if not product:
-                            continue
-
-                        product_name = product.get("description") or "Unknown Product"
-                        groups[production_date][product_name].append(item)
-
-                production_style = pdf.styles["Normal"].clone("production_style")
-                production_style.fontName = "Helvetica-Bold"
-                production_style.fontSize = 11
-                production_style.leading = 13
-                production_style.leftIndent = 0
-                production_style.firstLineIndent = 0
-                production_style.spaceBefore = 0
-                production_style.spaceAfter = 6
-
-                dispatch_style = pdf.styles["Normal"].clone("dispatch_style")
-                dispatch_style.fontName = "Helvetica-Bold"
-                dispatch_style.fontSize = 8
-                dispatch_style.leftIndent = 0
-                dispatch_style.firstLineIndent = 0
-                dispatch_style.spaceBefore = 0
-                dispatch_style.spaceAfter = 8
-
-                customer_style = pdf.styles["Normal"].clone("customer_style")
-                customer_style.fontName = "Helvetica-Bold"
-                customer_style.fontSize = 10
-                customer_style.leftIndent = 0
-                customer_style.firstLineIndent = 0
-                customer_style.spaceBefore = 0
-                customer_style.spaceAfter = 6
-
-                summary_title_style = pdf.styles["Normal"].clone("summary_title_style")
-                summary_title_style.fontName = "Helvetica-Bold"
-                summary_title_style.fontSize = 11
-                summary_title_style.leading = 13
-                summary_title_style.spaceBefore = 8
-                summary_title_style.spaceAfter = 8
-
-                summary_text_style = pdf.styles["Normal"].clone("summary_text_style")
-                summary_text_style.fontName = "Helvetica"
-                summary_text_style.fontSize = 9
-                summary_text_style.leading = 11
-                summary_text_style.spaceBefore = 0
-                summary_text_style.spaceAfter = 4
-
-                for production_date in sorted(groups.keys()):
-                    products = groups[production_date]
-
-                    formatted_date = datetime.datetime.fromisoformat(
-                        production_date.replace("Z", "+00:00")
-                    ).strftime("%d %b %Y")
-
-                    elements.append(
-                        Paragraph(f"For products dispatched on: {formatted_date}", dispatch_style)
-                    )
-                    elements.append(Spacer(1, 8))
-
-                    for product_name in sorted(products.keys()):
-                        product_items = products[product_name]
-
-                        summary["total_products"].add(product_name)
-
-                        for item in product_items:
-                            weight = (
-                                item.get("customer_weight")
-                                or item.get("weight")
-                                or item.get("net_weight")
-                                or 0
-                            )
-
-                            try:
-                                weight = float(weight)
-                            except Exception:
-                                weight = 0.0
-
-                            # each item row represents one box
-                            summary["total_boxes"] += 1
-                            summary["total_weight"] += weight
-                            summary["products"][product_name]["boxes"] += 1
-                            summary["products"][product_name]["weight"] += weight
-
-                        table = build_customer_allocation_table(pdf, (product_name, product_items))
-                        elements.append(table)
-                        elements.append(Spacer(1, 18))
-
-                    elements.append(Spacer(1, 8))
-
-                if elements and isinstance(elements[-1], Spacer):
-                    elements.pop()
-
-                elements.append(CondPageBreak(140))
-                elements.append(Paragraph("Summary", summary_title_style))
-                elements.append(
-                    Paragraph(
-                        f"Total AWBs: {len(summary['total_awbs'])}",
-                        summary_text_style
-                    )
-                )
-                elements.append(
-                    Paragraph(
-                        f"Total products: {len(summary['total_products'])}",
-                        summary_text_style
-                    )
-                )
-                elements.append(
-                    Paragraph(
-                        f"Total boxes: {summary['total_boxes']}",
-                        summary_text_style
-                    )
-                )
-                elements.append(
-                    Paragraph(
-                        f"Total weight: {summary['total_weight']:.2f} kg",
-                        summary_text_style
-                    )
-                )
-
-                elements.append(Spacer(1, 12))
-                elements.append(Paragraph("Product Breakdown", summary_title_style))
-                elements.append(Spacer(1, 6))
-
-                summary_data = [[
-                    Paragraph("Product", customer_style),
-                    Paragraph("Boxes", customer_style),
-                    Paragraph("Weight (kg)", customer_style),
-                ]]
-
-                for product_name in sorted(summary["products"].keys()):
-                    product_summary = summary["products"][product_name]
-                    summary_data.append([
-                        Paragraph(product_name, summary_text_style),
-                        Paragraph(str(product_summary["boxes"]), summary_text_style),
-                        Paragraph(f"{product_summary['weight']:.2f}", summary_text_style),
-                    ])
-
-                summary_table = Table(summary_data, colWidths=[300, 80, 100])
-                summary_table.setStyle(TableStyle([
-                    ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#EAEAEA")),
-                    ("TEXTCOLOR", (0, 0), (-1, 0), colors.black),
-                    ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
-                    ("FONTSIZE", (0, 0), (-1, -1), 9),
-                    ("GRID", (0, 0), (-1, -1), 0.5, colors.grey),
-                    ("ALIGN", (1, 1), (-1, -1), "CENTER"),
-                    ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
-                    ("BOTTOMPADDING", (0, 0), (-1, 0), 6),
-                    ("TOPPADDING", (0, 0), (-1, 0), 6),
-                ]))
-                elements.append(summary_table)
-
-                pdf.build(elements)
-                pdf_bytes = buf.getvalue()
-                buf.close()
-
-                file_path = f"customer-allocation-forms/{uuid4().hex}.pdf"
-
-                res = self.supabase_client.storage.from_("generated-reports").upload(
-                    file_path,
-                    pdf_bytes,
-                    {"content-type": "application/pdf"},
-                )
-
-                url = f"{os.getenv('SUPABASE_URL')}/storage/v1/object/public/{res.full_path}"
-
-                response.append({
-                    "type": "customer_allocation_form",
-                    "customer_id": customer_id,
-                    "url": url,
-                    "body": body,
-                    "date_generated": datetime.datetime.now(datetime.timezone.utc).isoformat()
-                })
+            documents = []
+
+            for index, company in enumerate(companies):
+                # Group each company's shipments once and share the result
+                # between every kind rendered for it
+                grouping = self._grouped("batch", index_shipments, company.shipments, kinds)
+
+                for kind in kinds:
+                    build = getattr(self, f"_{kind}_document")
+                    documents.append((kind, build(company, index, options or {}, grouping)))
+
+            entries = await self._publish_all((
+                self._publish_document(*document) for _, document in documents
+            ))
+
+            response: Dict[str, List[Dict[str, Any]]] = {kind: [] for kind in kinds}
+
+            for (kind, _), entry in zip(documents, entries):
+                if include_body:
+                    entry["body"] = msgspec.to_builtins(body)
+
+                response[kind].append(entry)
 
             return response
 
         except Exception as e:
             print(f"Error: {str(e)}")
-            raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+            record_failure("report_batch", e)
+            raise HTTPException(status_code=500, detail=str(e))
@@ -1,23 +1,68 @@
+import os
+import tempfile
+import time
+
 import camelot
+import httpx
 import pandas as pd
 import tabula
 from fastapi.concurrency import run_in_threadpool
-from fastapi import HTTPException, status
-from typing import Any, Dict, List
+from fastapi import HTTPException, Request, status
+from typing import Any, Callable, Dict, List
+
+from app.helpers.metrics import SCAN_ROWS, SCAN_STAGE_SECONDS, record_failure
+from app.models.scanner import ScanRequest
 
 class ScannerService:
     def __init__(self):
-        pass
+        # One client for the life of the app, so repeat downloads from the
+        # same host reuse the pooled connection instead of a new TLS handshake
+        self._client = httpx.AsyncClient(follow_redirects=True, timeout=60)
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+    async def _read_tables(self, template: str, reader: Callable[..., Any], shipment_url: str, **kwargs) -> Any:
+        # Fetch the file ourselves so download and extraction time are
+        # reported separately; the readers accept a local path just the same
+        started = time.perf_counter()
+        fd, path = tempfile.mkstemp(suffix=".pdf")
+
+        try:
+            with os.fdopen(fd, "wb") as file:
+                async with self._client.stream("GET", shipment_url) as response:
+                    response.raise_for_status()
+
+                    async for chunk in response.aiter_bytes():
+                        await run_in_threadpool(file.write, chunk)
 
-    async def scanner_template_one(self, body: List[Dict[str, Any]]):                        
+            downloaded = time.perf_counter()
+            SCAN_STAGE_SECONDS.labels(template, "download").observe(downloaded - started)
+
+            tables = await run_in_threadpool(reader, path, **kwargs)
+            SCAN_STAGE_SECONDS.labels(template, "extraction").observe(time.perf_counter() - downloaded)
+
+            return tables
+        finally:
+            os.unlink(path)
+
+    def _records(self, template: str, started: float, records: List[Dict[str, Any]]) -> Dict[str, Any]:
+        SCAN_STAGE_SECONDS.labels(template, "cleanup").observe(time.perf_counter() - started)
+        SCAN_ROWS.labels(template).inc(len(records))
+
+        return {"data": records}
+
+    async def scanner_template_one(self, body: ScanRequest):                        
         try:
-            shipment_url = body['scanned_shipment_url']
+            shipment_url = body.scanned_shipment_url
 
-            tables = await run_in_threadpool(
+            tables = await self._read_tables(
+                "template_one",
                 camelot.read_pdf,
                 shipment_url,
                 pages="all"
             )
+            started = time.perf_counter()
             
             df = pd.concat([t.df for t in tables], ignore_index=True)
             df = df.dropna(how="all")
@@ -60,22 +105,25 @@ class ScannerService:
         
             df = df.reset_index(drop=True)
 
-            return {"data": df.to_dict(orient="records")}
+            return self._records("template_one", started, df.to_dict(orient="records"))
         except Exception as e:
+            record_failure("scan_template_one", e)
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail=f"Unable to process shipment file. Please try again or manually import."
             )
             
-    async def scanner_template_two(self, body: List[Dict[str, Any]]):
+    async def scanner_template_two(self, body: ScanRequest):
         try:
-            shipment_url = body['scanned_shipment_url']
+            shipment_url = body.scanned_shipment_url
 
-            tables = await run_in_threadpool(
+            tables = await self._read_tables(
+                "template_two",
                 camelot.read_pdf,
                 shipment_url,
                 pages="all"
             )
+            started = time.perf_counter()
 
             df = pd.concat([t.df for t in tables], ignore_index=True)
             df = df.dropna(how="all")
@@ -135,25 +183,28 @@ class ScannerService:
                 "net_weight"
             ]]
 
-            return {"data": df_clean.to_dict(orient="records")}
+            return self._records("template_two", started, df_clean.to_dict(orient="records"))
 
         except Exception as e:
+            record_failure("scan_template_two", e)
             print(f"scanner_template_two failed: {e}")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Unable to process shipment file. Please try again or manually import."
             )
             
-    async def scanner_template_three(self, body: List[Dict[str, Any]]):
+    async def scanner_template_three(self, body: ScanRequest):
         try:
-            shipment_url = body["scanned_shipment_url"]
+            shipment_url = body.scanned_shipment_url
 
-            tables = await run_in_threadpool(
+            tables = await self._read_tables(
+                "template_three",
                 tabula.read_pdf,
                 shipment_url,
                 pages="all",
                 multiple_tables=True
             )
+            started = time.perf_counter()
 
             df = pd.concat(tables, ignore_index=True)
 
@@ -209,24 +260,27 @@ class ScannerService:
 
             df = df.reset_index(drop=True)
 
-            return {"data": df.to_dict(orient="records")}
+            return self._records("template_three", started, df.to_dict(orient="records"))
         except Exception as e:
+            record_failure("scan_template_three", e)
             print(f"scanner_template_three failed: {e}")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Unable to process shipment file. Please try again or manually import."
             )
             
-    async def scanner_template_four(self, body: List[Dict[str, Any]]):
+    async def scanner_template_four(self, body: ScanRequest):
         try:
-            shipment_url = body["scanned_shipment_url"]
+            shipment_url = body.scanned_shipment_url
 
-            tables = await run_in_threadpool(
+            tables = await self._read_tables(
+                "template_four",
                 tabula.read_pdf,
                 shipment_url,
                 pages="all",
                 multiple_tables=True
             )
+            started = time.perf_counter()
 
             df = pd.concat(tables, ignore_index=True)
             
@@ -257,28 +311,31 @@ class ScannerService:
             
             df = df.drop(columns=['box_no', 'fish_type_cut_type_skin_type', 'grade', 'weight', 'pcs'])
 
-            return {"data": df.to_dict(orient="records")}
+            return self._records("template_four", started, df.to_dict(orient="records"))
         except Exception as e:
+            record_failure("scan_template_four", e)
             print(f"scanner_template_four failed: {e}")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Unable to process shipment file. Please try again or manually import."
             )
             
-    async def scanner_template_five(self, body: List[Dict[str, Any]]):
+    async def scanner_template_five(self, body: ScanRequest):
         try:
-            shipment_url = body["scanned_shipment_url"]
+            shipment_url = body.scanned_shipment_url
 
-            tables = await run_in_threadpool(
+            tables = await self._read_tables(
+                "template_five",
                 tabula.read_pdf,
                 shipment_url,
                 pages="all",
                 multiple_tables=True,
                 stream=True,
             )
+            started = time.perf_counter()
 
             if not tables:
-                return {"data": []}
+                return self._records("template_five", started, [])
 
             df = pd.concat(tables, ignore_index=True)
             df.columns = [str(col).replace("\r", " ").replace("\n", " ").strip() for col in df.columns]
@@ -342,11 +399,15 @@ class ScannerService:
                     "pieces_per_box": pcs,
                 })
 
-            return {"data": records}
+            return self._records("template_five", started, records)
 
         except Exception as e:
+            record_failure("scan_template_five", e)
             print(f"scanner_template_five failed: {e}")
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
                 detail="Unable to process shipment file. Please try again or manually import."
-            )
\ No newline at end of file
+            )
+
+def get_scanner_service(request: Request) -> ScannerService:
+    return request.app.state.scanner_service
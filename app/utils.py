@@ -1,8 +1,11 @@
 from datetime import datetime
 from collections import defaultdict
 from typing import Any
+import hashlib
 import time    
 
+import msgspec
+
 def format_date(iso_str: str) -> str:
     dt = datetime.strptime(iso_str, "%Y-%m-%dT%H:%M:%S.%fZ")
     return dt.strftime("%d %B %Y")
@@ -24,4 +27,8 @@ def to_number(value, default=0):
             return default
         return float(value)
     except (TypeError, ValueError):
-        return default
\ No newline at end of file
+        return default
+
+def fingerprint(value: Any) -> str:
+    normalized = msgspec.json.encode(value, enc_hook=str, order="sorted")
+    return hashlib.sha256(normalized).hexdigest()
@@ -0,0 +1,208 @@
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Any, BinaryIO, Callable, Dict, List, Tuple
+
+import msgspec
+
+from app.classes.report import ReportTemplate
+from app.classes.spool import SpooledOutput
+from app.functions.render import REPORT_LAYOUTS, _template_options
+from app.helpers.executor import RenderExecutor
+from app.helpers.rendered_cache import RenderedCache
+from app.helpers.report_cache import ReportCache
+from app.models.report import REPORT_REQUEST_TYPES
+from app.services.report_service import REPORT_KINDS, ReportService
+from benchmarks.synthetic import companies, shipment
+
+
+class StubUploader:
+    # Stands in for StorageUploader so runs measure rendering, not the network
+    def __init__(self):
+        self.uploads = 0
+        self.uploaded_bytes = 0
+
+    async def upload(self, file_path: str, data: BinaryIO, content_type: str = "application/pdf", upsert: bool = False) -> str:
+        self.uploads += 1
+        self.uploaded_bytes += len(data.read())
+        return f"generated-reports/{file_path}"
+
+    def public_url(self, full_path: str) -> str:
+        return f"stub://{full_path}"
+
+    def stats(self) -> Dict[str, Any]:
+        return {"uploads": self.uploads, "uploaded_bytes": self.uploaded_bytes}
+
+
+def _body(kind: str, count: int, boxes: int, seed: int) -> Any:
+    if kind == "shipment_allocation":
+        return shipment(boxes, seed=seed)
+
+    return companies(count, boxes, seed=seed)
+
+
+def _timed(fn: Callable, *args) -> Tuple[Any, float]:
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def _stages(service: ReportService, kind: str, payload: bytes, options: Dict[str, Any]) -> Dict[str, Any]:
+    body, decode_s = _timed(msgspec.json.Decoder(REPORT_REQUEST_TYPES[kind]).decode, payload)
+    (_, _, job, _), grouping_s = _timed(service._document, kind, body, dict(options), 0)
+
+    orientation, build_elements = REPORT_LAYOUTS[kind]
+    output = SpooledOutput()
+    pdf = ReportTemplate(output, header_text=job["header_text"], orientation=orientation, **_template_options(job))
+
+    elements, elements_s = _timed(build_elements, pdf, job)
+    _, build_s = _timed(pdf.build, elements)
+    document = output.document()
+    document.close()
+
+    return {
+        "decode_s": round(decode_s, 4),
+        "grouping_s": round(grouping_s, 4),
+        "elements_s": round(elements_s, 4),
+        "build_s": round(build_s, 4),
+        "total_s": round(decode_s + grouping_s + elements_s + build_s, 4),
+        "pages": pdf.page,
+        "bytes": document.size,
+        "bytes_per_page": document.size // max(pdf.page, 1),
+    }
+
+
+def _peak_memory(service: ReportService, kind: str, payload: bytes, options: Dict[str, Any]) -> int:
+    tracemalloc.start()
+
+    try:
+        _stages(service, kind, payload, options)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return peak
+
+
+async def _service_run(executor: RenderExecutor, kind: str, count: int, boxes: int, seed: int, options: Dict[str, Any]) -> Dict[str, Any]:
+    uploader = StubUploader()
+    cache = ReportCache(":memory:")
+    service = ReportService(
+        render_executor=executor,
+        storage_uploader=uploader,
+        report_cache=cache,
+        rendered_cache=RenderedCache(),
+    )
+
+    if kind == "shipment_allocation":
+        bodies = [shipment(boxes, seed=seed + index) for index in range(count)]
+        started = time.perf_counter()
+        await asyncio.gather(*(service.create_shipment_allocation(body, options=dict(options)) for body in bodies))
+    else:
+        body = companies(count, boxes, seed=seed)
+        started = time.perf_counter()
+        await service.run(kind, body, dict(options))
+
+    seconds = time.perf_counter() - started
+    cache.close()
+
+    return {
+        "seconds": round(seconds, 4),
+        "documents": uploader.uploads,
+        "uploaded_bytes": uploader.uploaded_bytes,
+        "workers": executor.max_workers,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time report stages and end-to-end ReportService runs on synthetic data")
+    parser.add_argument("--kinds", nargs="+", choices=REPORT_KINDS, default=list(REPORT_KINDS))
+    parser.add_argument("--boxes", type=int, nargs="+", default=[10, 1000, 10000], help="boxes per document")
+    parser.add_argument("--companies", type=int, nargs="+", default=[1, 10], help="documents per service run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="render pool size for service runs")
+    parser.add_argument("--fast-cells", action="store_true")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc pass")
+    parser.add_argument("--skip-service", action="store_true", help="only run the in-process stage timings")
+    parser.add_argument("--output", default=None, help="also write all results to this JSON file")
+    args = parser.parse_args()
+
+    options = {
+        "fast_cells": args.fast_cells,
+        "generated_on": "2026-01-01",
+    }
+    results: List[Dict[str, Any]] = []
+
+    def record(result: Dict[str, Any]) -> None:
+        results.append(result)
+        print(json.dumps(result), flush=True)
+
+    stage_service = ReportService(
+        render_executor=None,
+        storage_uploader=StubUploader(),
+        report_cache=None,
+        rendered_cache=None,
+    )
+
+    for kind in args.kinds:
+        for boxes in args.boxes:
+            payload = msgspec.json.encode(_body(kind, 1, boxes, args.seed))
+
+            result = {
+                "benchmark": "stages",
+                "kind": kind,
+                "boxes": boxes,
+                "seed": args.seed,
+                "fast_cells": args.fast_cells,
+                "payload_bytes": len(payload),
+                **_stages(stage_service, kind, payload, options),
+            }
+
+            if not args.no_memory:
+                result["peak_memory_bytes"] = _peak_memory(stage_service, kind, payload, options)
+
+            record(result)
+
+    if not args.skip_service:
+        async def run_services():
+            executor = RenderExecutor(max_workers=args.workers)
+            executor.start()
+            await executor.warm()
+
+            try:
+                for kind in args.kinds:
+                    for count in args.companies:
+                        for boxes in args.boxes:
+                            record({
+                                "benchmark": "service",
+                                "kind": kind,
+                                "companies": count,
+                                "boxes": boxes,
+                                "seed": args.seed,
+                                "fast_cells": args.fast_cells,
+                                **await _service_run(executor, kind, count, boxes, args.seed, options),
+                            })
+            finally:
+                executor.shutdown()
+
+        asyncio.run(run_services())
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "meta": {
+                    "python": sys.version.split()[0],
+                    "platform": platform.platform(),
+                    "argv": sys.argv[1:],
+                    "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                },
+                "results": results,
+            }, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import random
+from typing import Any, Dict, List
+
+import msgspec
+
+from app.models.report import Company, Shipment, ShipmentItem
+
+PRODUCTS = [
+    "Fresh Sea Bream 300-400g Whole Gutted",
+    "Fresh Sea Bream 400-600g Whole Gutted",
+    "Fresh Sea Bass 600-800g Whole Gutted",
+    "Fresh Sea Bass Fillets Skin On",
+    "Fresh Turbot 1-2kg Whole",
+    "Fresh Meagre 2-3kg Whole Gutted",
+]
+SUPPLIERS = ["Aegean Farms", "Ionian Catch", "Kordon Su Urunleri", "Selonda"]
+
+
+def _item(rng: random.Random, box_number: int, awb: str, customers: int, haulers: int) -> Dict[str, Any]:
+    net_weight = round(rng.uniform(5, 25), 2)
+    price_per_kilo = round(rng.uniform(6, 14), 2)
+    # Roughly one box in eight arrives unallocated
+    customer = {"name": f"Customer {rng.randint(1, customers)}"} if rng.random() > 0.125 else None
+    hauler = {"name": f"Haulier {rng.randint(1, haulers)}"}
+
+    return {
+        "box_number": box_number,
+        "awb": awb,
+        "product": {"description": rng.choice(PRODUCTS)},
+        "customer": customer,
+        "currency": "GBP",
+        "rate": 1,
+        "net_weight": net_weight,
+        "pieces_per_box": rng.randint(10, 40),
+        "todays_price_per_kilo": price_per_kilo,
+        "price": round(net_weight * price_per_kilo, 2),
+        "transportCompany": hauler,
+        "transport_companies": hauler,
+    }
+
+
+def _shipments(rng: random.Random, boxes: int, boxes_per_shipment: int, customers: int, haulers: int) -> List[Dict[str, Any]]:
+    shipments = []
+    box_number = 0
+
+    while box_number < boxes:
+        count = min(boxes_per_shipment, boxes - box_number)
+        awb = f"{rng.randint(100, 999)}-{rng.randint(10000000, 99999999)}"
+        production_date = f"2026-03-{rng.randint(1, 28):02d}T00:00:00.000Z"
+
+        shipments.append({
+            "id": len(shipments) + 1,
+            "awb": awb,
+            "supplier": rng.choice(SUPPLIERS),
+            "country": "TR",
+            "production_date": production_date,
+            "arrival_date": production_date,
+            "expiry_date": "2026-04-30T00:00:00.000Z",
+            "storage_companies": {"id": 1, "name": "Cold Store One"},
+            "shipment_items": [
+                _item(rng, box_number + index + 1, awb, customers, haulers)
+                for index in range(count)
+            ],
+        })
+        box_number += count
+
+    return shipments
+
+
+def shipment_items(count: int, seed: int = 0) -> List[ShipmentItem]:
+    rng = random.Random(seed)
+
+    return msgspec.convert(
+        [_item(rng, index + 1, "000-00000000", 40, 5) for index in range(count)],
+        List[ShipmentItem],
+    )
+
+
+def shipment(boxes: int, seed: int = 0) -> Shipment:
+    rng = random.Random(seed)
+
+    return msgspec.convert(_shipments(rng, boxes, boxes, 40, 5)[0], Shipment)
+
+
+def companies(
+    count: int,
+    boxes: int,
+    seed: int = 0,
+    boxes_per_shipment: int = 200,
+    customers: int = 40,
+    haulers: int = 5,
+) -> List[Company]:
+    # boxes is per company, spread over shipments of boxes_per_shipment
+    rng = random.Random(seed)
+
+    return msgspec.convert(
+        [
+            {
+                "id": index + 1,
+                "name": f"Company {index + 1}",
+                "shipments": _shipments(rng, boxes, boxes_per_shipment, customers, haulers),
+            }
+            for index in range(count)
+        ],
+        List[Company],
+    )
@@ -0,0 +1,72 @@
+import argparse
+import json
+import time
+import tracemalloc
+from io import BytesIO
+from typing import Any, Dict, List
+
+from app.classes.report import ReportTemplate
+from app.functions.table import build_shipment_allocation_table
+from app.models.report import ShipmentItem
+from benchmarks.synthetic import shipment_items
+
+
+def _build(items: List[ShipmentItem], chunked: bool, fast: bool) -> ReportTemplate:
+    pdf = ReportTemplate(BytesIO(), header_text="Benchmark", orientation="landscape")
+    pdf.build([build_shipment_allocation_table(pdf, items, fast=fast, chunked=chunked)])
+
+    return pdf
+
+
+def _peak_memory(items: List[ShipmentItem], chunked: bool, fast: bool) -> int:
+    # Separate pass, since tracing slows the build down several times over
+    tracemalloc.start()
+
+    try:
+        _build(items, chunked, fast)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return peak
+
+
+def _layout(items: List[ShipmentItem], chunked: bool, fast: bool, memory: bool) -> Dict[str, Any]:
+    started = time.perf_counter()
+    pdf = _build(items, chunked, fast)
+    elapsed = time.perf_counter() - started
+
+    result = {
+        "layout": "chunked" if chunked else "table",
+        "rows": len(items),
+        "fast_cells": fast,
+        "seconds": round(elapsed, 3),
+        "pages": pdf.page,
+        "bytes": len(pdf.filename.getvalue()),
+    }
+
+    if memory:
+        result["peak_memory_bytes"] = _peak_memory(items, chunked, fast)
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare single Table and ChunkedTable layout time")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--fast-cells", action="store_true")
+    parser.add_argument("--memory", action="store_true", help="add a tracemalloc pass for peak memory")
+    parser.add_argument("--table-max-rows", type=int, default=None, help="skip the single Table layout above this size")
+    args = parser.parse_args()
+
+    for rows in args.rows:
+        items = shipment_items(rows)
+
+        print(json.dumps(_layout(items, chunked=True, fast=args.fast_cells, memory=args.memory)))
+
+        if args.table_max_rows is None or rows <= args.table_max_rows:
+            print(json.dumps(_layout(items, chunked=False, fast=args.fast_cells, memory=args.memory)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import asyncio
+
+from app.helpers.admission import AdmissionLimit, AdmissionMiddleware
+
+
+async def _request(app, path="/reports", method="POST"):
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": method, "path": path, "headers": [], "query_string": b""}
+    await app(scope, receive, send)
+
+    start = next(message for message in messages if message["type"] == "http.response.start")
+    return start["status"], dict(start["headers"])
+
+
+def _app(release: asyncio.Event):
+    async def app(scope, receive, send):
+        await release.wait()
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    return app
+
+
+def test_limit_queues_then_rejects_when_the_queue_is_full():
+    async def scenario():
+        limit = AdmissionLimit("reports", max_concurrent=1, max_queued=1, timeout_seconds=1)
+
+        assert await limit.acquire() is None
+        queued = asyncio.create_task(limit.acquire())
+        await asyncio.sleep(0)
+
+        assert await limit.acquire() == "queue_full"
+
+        limit.release()
+        assert await queued is None
+        limit.release()
+
+        return limit.stats()
+
+    stats = asyncio.run(scenario())
+
+    assert stats["rejected"] == 1
+    assert stats["in_flight"] == 0
+    assert stats["waiting"] == 0
+
+
+def test_limit_rejects_after_waiting_too_long():
+    async def scenario():
+        limit = AdmissionLimit("reports", max_concurrent=1, max_queued=1, timeout_seconds=0.01)
+
+        assert await limit.acquire() is None
+        reason = await limit.acquire()
+        limit.release()
+
+        return reason, limit.stats()
+
+    reason, stats = asyncio.run(scenario())
+
+    assert reason == "timeout"
+    assert stats["waiting"] == 0
+
+
+def test_middleware_answers_429_when_the_queue_overflows(monkeypatch):
+    monkeypatch.setenv("ADMISSION_RETRY_AFTER_SECONDS", "7")
+
+    async def scenario():
+        release = asyncio.Event()
+        limits = {"reports": AdmissionLimit("reports", max_concurrent=1, max_queued=1, timeout_seconds=5)}
+        middleware = AdmissionMiddleware(_app(release), limits=limits)
+
+        running = asyncio.create_task(_request(middleware))
+        queued = asyncio.create_task(_request(middleware))
+        await asyncio.sleep(0.01)
+
+        rejected = await _request(middleware)
+        release.set()
+
+        return rejected, await running, await queued
+
+    rejected, running, queued = asyncio.run(scenario())
+
+    assert rejected[0] == 429
+    assert rejected[1][b"retry-after"] == b"7"
+    assert running[0] == 200
+    assert queued[0] == 200
+
+
+def test_middleware_skips_reads_and_unlimited_paths():
+    async def scenario():
+        release = asyncio.Event()
+        release.set()
+        limits = {"reports": AdmissionLimit("reports", max_concurrent=1, max_queued=0, timeout_seconds=5)}
+        middleware = AdmissionMiddleware(_app(release), limits=limits)
+
+        await limits["reports"].acquire()
+
+        try:
+            return (
+                await _request(middleware, method="GET"),
+                await _request(middleware, path="/ping"),
+                await _request(middleware),
+            )
+        finally:
+            limits["reports"].release()
+
+    read, other, limited = asyncio.run(scenario())
+
+    assert read[0] == 200
+    assert other[0] == 200
+    assert limited[0] == 429
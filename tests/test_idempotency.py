@@ -0,0 +1,131 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.helpers.idempotency import IdempotencyStore
+
+
+def _store(tmp_path) -> IdempotencyStore:
+    return IdempotencyStore(path=str(tmp_path / "state.sqlite3"), ttl_seconds=3600)
+
+
+def test_concurrent_duplicates_share_one_run(tmp_path):
+    async def scenario():
+        store = _store(tmp_path)
+        calls = []
+
+        async def produce():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return 201, {"id": len(calls)}
+
+        try:
+            results = await asyncio.gather(*(store.run("reports", "key", "a", produce) for _ in range(3)))
+        finally:
+            store.close()
+
+        return calls, results, store.stats()
+
+    calls, results, stats = asyncio.run(scenario())
+
+    assert len(calls) == 1
+    assert [result[:2] for result in results] == [(201, {"id": 1})] * 3
+    assert sorted(result[2] for result in results) == [False, True, True]
+    assert stats["joined"] == 2
+    assert stats["pending"] == 0
+
+
+def test_repeat_replays_the_stored_result(tmp_path):
+    async def scenario():
+        store = _store(tmp_path)
+
+        async def produce():
+            return 200, {"url": "https://example.com/a.pdf"}
+
+        try:
+            first = await store.run("reports", "key", "a", produce)
+            second = await store.run("reports", "key", "a", produce)
+        finally:
+            store.close()
+
+        return first, second
+
+    first, second = asyncio.run(scenario())
+
+    assert first == (200, {"url": "https://example.com/a.pdf"}, False)
+    assert second == (200, {"url": "https://example.com/a.pdf"}, True)
+
+
+def test_different_request_with_a_stored_key_is_rejected(tmp_path):
+    async def scenario():
+        store = _store(tmp_path)
+
+        async def produce():
+            return 200, {}
+
+        try:
+            await store.run("reports", "key", "a", produce)
+            await store.run("reports", "key", "b", produce)
+        finally:
+            store.close()
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(scenario())
+
+    assert error.value.status_code == 422
+
+
+def test_different_request_with_a_pending_key_is_rejected(tmp_path):
+    async def scenario():
+        store = _store(tmp_path)
+        started = asyncio.Event()
+
+        async def produce():
+            started.set()
+            await asyncio.sleep(0.05)
+            return 200, {}
+
+        try:
+            first = asyncio.create_task(store.run("reports", "key", "a", produce))
+            await started.wait()
+
+            with pytest.raises(HTTPException) as error:
+                await store.run("reports", "key", "b", produce)
+
+            await first
+        finally:
+            store.close()
+
+        return error.value.status_code
+
+    assert asyncio.run(scenario()) == 422
+
+
+def test_failures_are_not_stored(tmp_path):
+    async def scenario():
+        store = _store(tmp_path)
+        calls = []
+
+        async def produce():
+            calls.append(1)
+
+            if len(calls) == 1:
+                raise RuntimeError("upload failed")
+
+            return 200, {"ok": True}
+
+        try:
+            with pytest.raises(RuntimeError):
+                await store.run("reports", "key", "a", produce)
+
+            result = await store.run("reports", "key", "a", produce)
+        finally:
+            store.close()
+
+        return calls, result
+
+    calls, result = asyncio.run(scenario())
+
+    assert len(calls) == 2
+    assert result == (200, {"ok": True}, False)
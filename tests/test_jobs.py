@@ -0,0 +1,147 @@
+import asyncio
+import time
+
+from app.helpers.jobs import ReportJobQueue
+
+
+class FakeService:
+    def __init__(self, calls, fail=False):
+        self.calls = calls
+        self.fail = fail
+        self.on_document_published = None
+
+    async def run(self, kind, body, options, include_body):
+        self.calls.append((kind, body))
+
+        if self.fail:
+            raise RuntimeError("render failed")
+
+        for entry in body:
+            await self.on_document_published(entry)
+
+        return {"documents": len(body)}
+
+
+def _queue(tmp_path, calls, fail=False) -> ReportJobQueue:
+    return ReportJobQueue(
+        service_factory=lambda: FakeService(calls, fail=fail),
+        path=str(tmp_path / "state.sqlite3"),
+        workers=1,
+    )
+
+
+async def _finished(queue: ReportJobQueue, job_id: str, timeout: float = 5):
+    deadline = time.monotonic() + timeout
+
+    while time.monotonic() < deadline:
+        job = await queue.get(job_id)
+
+        if job["status"] in ("completed", "failed"):
+            return job
+
+        await asyncio.sleep(0.01)
+
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_jobs_run_to_completion_with_progress(tmp_path):
+    async def scenario():
+        calls = []
+        queue = _queue(tmp_path, calls)
+        await queue.start()
+
+        try:
+            job_id = await queue.enqueue("release_form", [{"id": 1}, {"id": 2}], {})
+            job = await _finished(queue, job_id)
+            stats = await queue.stats()
+        finally:
+            await queue.stop()
+
+        return calls, job, stats
+
+    calls, job, stats = asyncio.run(scenario())
+
+    assert calls == [("release_form", [{"id": 1}, {"id": 2}])]
+    assert job["status"] == "completed"
+    assert job["progress"] == {"completed": 2, "total": 2}
+    assert job["result"] == {"documents": 2}
+    assert stats["completed"] == 1
+    assert stats["queued"] == 0
+
+
+def test_failed_jobs_record_the_error(tmp_path):
+    async def scenario():
+        queue = _queue(tmp_path, [], fail=True)
+        await queue.start()
+
+        try:
+            job_id = await queue.enqueue("release_form", [{"id": 1}], {})
+            return await _finished(queue, job_id)
+        finally:
+            await queue.stop()
+
+    job = asyncio.run(scenario())
+
+    assert job["status"] == "failed"
+    assert job["error"] == "render failed"
+
+
+def test_running_jobs_are_requeued_after_a_restart(tmp_path):
+    async def scenario():
+        calls = []
+
+        # A job claimed by a process that then went away stays "running"
+        interrupted = _queue(tmp_path, calls)
+        job_id = await interrupted.enqueue("release_form", [{"id": 1}], {})
+        claimed = await interrupted._db.run(interrupted._claim)
+        assert claimed["id"] == job_id
+        await interrupted.stop()
+
+        queue = _queue(tmp_path, calls)
+        await queue.start()
+
+        try:
+            return calls, await _finished(queue, job_id)
+        finally:
+            await queue.stop()
+
+    calls, job = asyncio.run(scenario())
+
+    assert len(calls) == 1
+    assert job["status"] == "completed"
+
+
+def test_workers_survive_database_errors(tmp_path, monkeypatch):
+    monkeypatch.setenv("REPORT_JOB_ERROR_BACKOFF_SECONDS", "0")
+
+    async def scenario():
+        calls = []
+        queue = _queue(tmp_path, calls)
+        finish = queue._finish
+        failures = []
+
+        def flaky_finish(job_id, result=None, error=None):
+            if not failures:
+                failures.append(job_id)
+                raise RuntimeError("database is locked")
+
+            return finish(job_id, result, error)
+
+        queue._finish = flaky_finish
+        await queue.start()
+
+        try:
+            first = await queue.enqueue("release_form", [{"id": 1}], {})
+            first_job = await _finished(queue, first)
+            second = await queue.enqueue("release_form", [{"id": 2}], {})
+            second_job = await _finished(queue, second)
+        finally:
+            await queue.stop()
+
+        return first_job, second_job
+
+    first_job, second_job = asyncio.run(scenario())
+
+    assert first_job["status"] == "failed"
+    assert "database is locked" in first_job["error"]
+    assert second_job["status"] == "completed"
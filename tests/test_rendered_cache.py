@@ -0,0 +1,84 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.classes.spool import SpooledDocument
+from app.helpers import rendered_cache
+from app.helpers.rendered_cache import RenderedCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(value=1000.0)
+    monkeypatch.setattr(rendered_cache, "time", SimpleNamespace(monotonic=lambda: now.value))
+
+    return now
+
+
+def _document(size: int = 8) -> SpooledDocument:
+    return SpooledDocument(b"x" * size, None, size, "checksum")
+
+
+def test_expired_entries_are_dropped_once_released(clock):
+    cache = RenderedCache(ttl_seconds=60)
+    cache.put("a", _document(), 1)
+    cache.release("a")
+
+    clock.value += 61
+
+    assert cache.get("a") is None
+    assert cache.stats()["expired"] == 1
+
+
+def test_leased_entries_are_never_evicted(clock):
+    cache = RenderedCache(ttl_seconds=60)
+    document = _document()
+    cache.put("a", document, 3)
+
+    clock.value += 61
+    cache.put("b", _document(), 1)
+
+    assert cache.get("a") == (document, 3)
+
+    # Two leases now: the put and the get
+    cache.release("a")
+    clock.value += 61
+    assert cache.get("b") is not None
+    assert cache.stats()["entries"] == 2
+
+    cache.release("a")
+    cache.release("b")
+    cache.release("b")
+    clock.value += 61
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_memory_pressure_spills_instead_of_evicting(clock, monkeypatch, tmp_path):
+    monkeypatch.setenv("REPORT_SPOOL_DIR", str(tmp_path))
+    cache = RenderedCache(ttl_seconds=60, max_memory_bytes=10)
+    first, second = _document(), _document()
+
+    cache.put("a", first, 1)
+    cache.put("b", second, 1)
+
+    assert first.path is not None and first.path.startswith(str(tmp_path))
+    assert second.path is None
+    assert first.read() == b"x" * 8
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["spilled"] == 1
+
+    cache.close()
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_stored_documents_are_released_and_closed(clock):
+    cache = RenderedCache(ttl_seconds=60)
+    document = _document()
+    cache.put("a", document, 1)
+
+    cache.release("a", stored=True)
+
+    assert cache.get("a") is None
+    assert document.data is None
+    assert cache.stats()["uploading"] == 0